@@ -0,0 +1,59 @@
+"""
+Micro-Batching of AI Rewrite Requests
+تجمیع درخواست‌های بازنویسی هم‌زمان در یک درخواست
+
+The pipeline's AI workers call AIProcessor.process_news one article at a time.
+AIBatcher groups calls that arrive within window_seconds of each other, up to
+max_items, and hands them to run_batch as one list. The first caller in a
+group waits for companions and runs the batch, a caller that fills the group
+runs it at once, and everyone else blocks until their own result is ready.
+"""
+
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List
+
+
+class AIBatcher:
+    def __init__(self, run_batch: Callable[[List], List], max_items: int = 3, window_seconds: float = 1.5):
+        self.run_batch = run_batch
+        self.max_items = max(1, max_items)
+        self.window_seconds = window_seconds
+        self._pending = []  # [(payload, Future)]
+        self._cond = threading.Condition()
+
+    def submit(self, payload):
+        """Result of run_batch for payload (blocks); re-raises the batch's exception."""
+        future = Future()
+        batch = None
+        with self._cond:
+            self._pending.append((payload, future))
+            if len(self._pending) >= self.max_items:
+                batch, self._pending = self._pending, []
+                self._cond.notify_all()
+            elif len(self._pending) == 1:
+                # First of a group: give other workers a moment to join
+                deadline = time.monotonic() + self.window_seconds
+                while self._pending and self._pending[0][1] is future:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        batch, self._pending = self._pending, []
+                        break
+                    self._cond.wait(remaining)
+        if batch:
+            self._run(batch)
+        return future.result()
+
+    def _run(self, batch: List):
+        try:
+            results = self.run_batch([payload for payload, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for n, (_, future) in enumerate(batch):
+            if n < len(results):
+                future.set_result(results[n])
+            else:
+                future.set_exception(RuntimeError(f"batch returned {len(results)} results for {len(batch)} items"))
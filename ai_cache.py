@@ -0,0 +1,63 @@
+"""
+Content-Addressed Cache for Gemini Responses
+کش پاسخ‌های Gemini بر اساس هش ورودی
+
+AIProcessor keys every generate_content call by a SHA-256 of the model name
+and the full prompt (template + article text). The response text is kept in
+ai_cache.json, so an article whose rewrite already succeeded, in a run that
+crashed or failed to publish, is not sent to Gemini again. Entries expire after
+ttl_seconds; past max_entries the oldest ones are dropped.
+"""
+
+import os
+import json
+import hashlib
+import threading
+import time
+from typing import Dict, Optional
+
+from cache_storage import write_json_atomic
+
+
+class AIResponseCache:
+    """{key: {'response', 'created_at'}} kept in one JSON file."""
+
+    def __init__(self, path: str = "ai_cache.json", ttl_seconds: int = 72 * 3600, max_entries: int = 500):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self.entries: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except Exception as e:
+                print(f"[WARNING] Error loading {path}: {e}")
+
+    @staticmethod
+    def key(model_name: str, prompt: str) -> str:
+        return hashlib.sha256(f"{model_name}\0{prompt}".encode('utf-8')).hexdigest()
+
+    def _expired(self, entry: Dict, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - entry.get('created_at', 0) > self.ttl_seconds
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None or self._expired(entry, time.time()):
+                return None
+            return entry['response']
+
+    def put(self, key: str, response: str):
+        now = time.time()
+        with self._lock:
+            self.entries[key] = {'response': response, 'created_at': now}
+            self.entries = {k: e for k, e in self.entries.items() if not self._expired(e, now)}
+            if len(self.entries) > self.max_entries:
+                newest = sorted(self.entries, key=lambda k: self.entries[k]['created_at'])[-self.max_entries:]
+                self.entries = {k: self.entries[k] for k in newest}
+            try:
+                write_json_atomic(self.path, self.entries, ensure_ascii=False)
+            except Exception as e:
+                print(f"[WARNING] Error saving {self.path}: {e}")
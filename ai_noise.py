@@ -0,0 +1,56 @@
+"""
+AI Meta-Commentary Filter
+حذف خطوط توضیحی هوش مصنوعی از متن خبر
+
+When a rewrite is not used, the text that is published can still carry the
+model's analysis ("عنوان پیشنهادی", "نکات سئو", ...). The patterns for
+such lines are kept in ai_noise_patterns.txt. NoiseFilter compiles them once
+into a single alternation, so each line is checked with one regex search
+instead of one search per pattern.
+"""
+
+import os
+import re
+from typing import List
+
+DEFAULT_PATTERNS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ai_noise_patterns.txt")
+
+
+def load_noise_patterns(path: str) -> List[str]:
+    """One regex per line; blank lines and # comments are skipped."""
+    patterns = []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#') and line not in patterns:
+                    patterns.append(line)
+    except Exception as e:
+        print(f"[WARNING] Error loading {path}: {e}")
+    return patterns
+
+
+class NoiseFilter:
+    def __init__(self, patterns: List[str]):
+        self.patterns = list(patterns)
+        # Each pattern keeps its own group so an alternation inside one cannot leak into the next
+        self._regex = re.compile('|'.join(f'(?:{p})' for p in self.patterns)) if self.patterns else None
+
+    @classmethod
+    def from_file(cls, path: str = DEFAULT_PATTERNS_FILE) -> "NoiseFilter":
+        return cls(load_noise_patterns(path))
+
+    def is_noise(self, line: str) -> bool:
+        return self._regex is not None and self._regex.search(line.strip()) is not None
+
+    def strip(self, text: str) -> str:
+        """text without its noise lines; blank lines are kept as they are."""
+        if not text or self._regex is None:
+            return text
+        search = self._regex.search
+        clean_lines = []
+        for line in text.split('\n'):
+            stripped = line.strip()
+            if not stripped or search(stripped) is None:
+                clean_lines.append(line)
+        return '\n'.join(clean_lines)
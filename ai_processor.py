@@ -3,9 +3,71 @@ AI Processor Module
 ماژول پردازش اخبار با هوش مصنوعی Gemini
 """
 
+import json
 import google.generativeai as genai
-from typing import Dict, Optional
-from config import GEMINI_API_KEY, APP_EXTRA_CONFIG, AI_TRANSLATE_PROMPT
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Tuple
+from config import (
+    GEMINI_API_KEY, APP_EXTRA_CONFIG, AI_TRANSLATE_PROMPT,
+    AI_CACHE_ENABLED, AI_CACHE_FILE, AI_CACHE_TTL_HOURS, AI_CACHE_MAX_ENTRIES,
+    GEMINI_REQUESTS_PER_MINUTE, GEMINI_TOKENS_PER_MINUTE, GEMINI_MAX_CONCURRENCY, GEMINI_MAX_RETRIES,
+    AI_BATCH_SIZE, AI_BATCH_WINDOW_SECONDS, AI_BATCH_MAX_CHARS
+)
+from ai_batcher import AIBatcher
+from ai_cache import AIResponseCache
+from gemini_executor import GeminiExecutor
+
+# Gemini is asked for JSON matching these schemas (response_mime_type / response_schema)
+REWRITE_SCHEMA = {
+    'type': 'OBJECT',
+    'properties': {
+        'title': {'type': 'STRING'},
+        'content': {'type': 'STRING'},
+        'meta_description': {'type': 'STRING'},
+        'tags': {'type': 'ARRAY', 'items': {'type': 'STRING'}},
+    },
+    'required': ['title', 'content', 'meta_description', 'tags'],
+}
+BATCH_SCHEMA = {
+    'type': 'ARRAY',
+    'items': {
+        'type': 'OBJECT',
+        'properties': dict(REWRITE_SCHEMA['properties'], id={'type': 'STRING'}),
+        'required': ['id'] + REWRITE_SCHEMA['required'],
+    },
+}
+
+REASK_SUFFIX = """
+
+پاسخ قبلی JSON معتبر با همه فیلدهای خواسته‌شده نبود. دوباره فقط همان JSON را کامل و معتبر برگردان.
+"""
+
+
+@dataclass
+class RewriteResult:
+    """A validated rewrite; structured=False means the AI failed and the input is passed through."""
+    title: str
+    content: str
+    meta_description: str = ""
+    tags: List[str] = field(default_factory=list)
+    structured: bool = True
+
+
+def _parse_rewrite(data) -> Optional[RewriteResult]:
+    """RewriteResult from a decoded JSON object, or None if required fields are missing."""
+    if not isinstance(data, dict):
+        return None
+    title, content = data.get('title'), data.get('content')
+    if not isinstance(title, str) or not isinstance(content, str) or not title.strip() or not content.strip():
+        return None
+    meta_description = data.get('meta_description')
+    tags = data.get('tags')
+    return RewriteResult(
+        title=title.strip(),
+        content=content.strip(),
+        meta_description=meta_description.strip() if isinstance(meta_description, str) else "",
+        tags=[tag.strip() for tag in tags if isinstance(tag, str) and tag.strip()] if isinstance(tags, list) else [],
+    )
 
 
 class AIProcessor:
@@ -17,30 +79,43 @@ class AIProcessor:
         
         genai.configure(api_key=GEMINI_API_KEY)
         # Use gemini-2.5-flash-lite model which works for the current API key
-        self.model = genai.GenerativeModel('gemini-2.5-flash-lite')
+        self.model_name = 'gemini-2.5-flash-lite'
+        self.model = genai.GenerativeModel(self.model_name)
+        self.cache = AIResponseCache(
+            AI_CACHE_FILE, AI_CACHE_TTL_HOURS * 3600, AI_CACHE_MAX_ENTRIES
+        ) if AI_CACHE_ENABLED else None
+        # Shared by the pipeline's AI worker threads: RPM/TPM quota, adaptive concurrency, 429 backoff
+        self.executor = GeminiExecutor(
+            GEMINI_REQUESTS_PER_MINUTE, GEMINI_TOKENS_PER_MINUTE, GEMINI_MAX_CONCURRENCY, GEMINI_MAX_RETRIES
+        )
+        # Short articles that reach the AI stage together share one prompt
+        self.batcher = AIBatcher(
+            self._process_persian_batch, AI_BATCH_SIZE, AI_BATCH_WINDOW_SECONDS
+        ) if AI_BATCH_SIZE > 1 else None
     
-    def process_news(self, title: str, description: str, language: str = 'fa'):
+    def process_news(self, title: str, description: str, language: str = 'fa') -> RewriteResult:
         """
         Process a news item:
         - Translate if English
         - Summarize and format for blog
-        - Generate tags
+        - Generate meta description and tags
         """
         try:
             if language == 'en':
                 # Translate and process English news
-                processed = self._translate_and_process(title, description)
+                return self._translate_and_process(title, description)
+            elif self.batcher and len(description) <= AI_BATCH_MAX_CHARS:
+                # Short Persian news: rewritten together with other short items
+                return self.batcher.submit((title, description))
             else:
                 # Process Persian news
-                processed = self._process_persian(title, description)
-            
-            return processed.get('title', title), processed.get('content', description)
+                return self._process_persian(title, description)
             
         except Exception as e:
             print(f"❌ AI Processing error: {e}")
-            return title, description
+            return RewriteResult(title=title, content=description, structured=False)
     
-    def _translate_and_process(self, title: str, description: str) -> Dict:
+    def _translate_and_process(self, title: str, description: str) -> RewriteResult:
         """Translate English news to Persian and format"""
         
         prompt = f"""
@@ -53,6 +128,7 @@ class AIProcessor:
 {{
     "title": "عنوان فارسی جذاب",
     "content": "متن کامل خبر به فارسی (۲-۳ پاراگراف)",
+    "meta_description": "خلاصه یک‌جمله‌ای برای موتورهای جستجو (حداکثر ۱۶۰ نویسه)",
     "tags": ["تگ۱", "تگ۲", "تگ۳"]
 }}
 
@@ -60,13 +136,10 @@ class AIProcessor:
 نکته مهم: از هیچ علامت نگارشی مثل ستاره (**) یا هشتگ (##) در متن استفاده نکن و نام خبرگزاری یا منبع را در متن ذکر نکن.
 """
         
-        response = self.model.generate_content(prompt)
-        return self._parse_ai_response(response.text)
+        return self._rewrite(prompt)
     
-    def _process_persian(self, title: str, description: str) -> Dict:
-        """Process and enhance Persian news"""
-        
-        prompt = f"""
+    def _persian_prompt(self, title: str, description: str) -> str:
+        return f"""
 {APP_EXTRA_CONFIG}
 
 عنوان خبر: {title}
@@ -76,42 +149,154 @@ class AIProcessor:
 {{
     "title": "عنوان بهبود یافته و جذاب",
     "content": "متن خبر به صورت روان و مناسب وبلاگ (۲-۳ پاراگراف)",
+    "meta_description": "خلاصه یک‌جمله‌ای برای موتورهای جستجو (حداکثر ۱۶۰ نویسه)",
     "tags": ["تگ۱", "تگ۲", "تگ۳"]
 }}
 
 فقط JSON خالص برگردان، بدون هیچ توضیح اضافی.
 نکته بسیار مهم: از هیچ علامت نگارشی مثل ستاره (**) یا هشتگ (##) در متن استفاده نکن. همچنین به هیچ وجه نام منبع خبر یا خبرگزاری را در داخل متن نیاور!
 """
+    
+    def _process_persian(self, title: str, description: str) -> RewriteResult:
+        """Process and enhance Persian news"""
+        return self._rewrite(self._persian_prompt(title, description))
+    
+    def _batch_prompt(self, items: List[Tuple[str, str]]) -> str:
+        news = [{"id": str(n), "title": title, "text": description} for n, (title, description) in enumerate(items, 1)]
+        return f"""
+{APP_EXTRA_CONFIG}
+
+چند خبر جداگانه در قالب آرایه JSON آمده است. هر خبر را مستقل از بقیه بازنویسی کن:
+{json.dumps(news, ensure_ascii=False, indent=1)}
+
+لطفاً خروجی را فقط به صورت یک آرایه JSON بده، برای هر خبر یک عضو با همان id:
+[
+    {{
+        "id": "1",
+        "title": "عنوان بهبود یافته و جذاب",
+        "content": "متن خبر به صورت روان و مناسب وبلاگ (۲-۳ پاراگراف)",
+        "meta_description": "خلاصه یک‌جمله‌ای برای موتورهای جستجو (حداکثر ۱۶۰ نویسه)",
+        "tags": ["تگ۱", "تگ۲", "تگ۳"]
+    }}
+]
+
+فقط JSON خالص برگردان، بدون هیچ توضیح اضافی.
+نکته بسیار مهم: از هیچ علامت نگارشی مثل ستاره (**) یا هشتگ (##) در متن استفاده نکن. همچنین به هیچ وجه نام منبع خبر یا خبرگزاری را در داخل متن نیاور!
+"""
+    
+    def _process_persian_batch(self, items: List[Tuple[str, str]]) -> List[RewriteResult]:
+        """_process_persian for several (title, description) pairs, sharing Gemini calls."""
+        results: List[Optional[RewriteResult]] = [None] * len(items)
+        todo = []
+        for index, (title, description) in enumerate(items):
+            # An item rewritten before (alone or in another batch) comes from the cache
+            cached = self._cached(self._persian_prompt(title, description))
+            if cached is not None:
+                results[index] = cached
+            else:
+                todo.append(index)
+        if todo:
+            self._fill_batch(items, todo, results)
+        return results
+    
+    def _fill_batch(self, items: List[Tuple[str, str]], indexes: List[int], results: List[Optional[RewriteResult]]):
+        """Fill results[i] for i in indexes; an item that cannot be rewritten gets the unstructured fallback."""
+        if len(indexes) == 1:
+            index = indexes[0]
+            try:
+                results[index] = self._process_persian(*items[index])
+            except Exception as e:
+                print(f"❌ AI Processing error: {e}")
+                results[index] = RewriteResult(title=items[index][0], content=items[index][1], structured=False)
+            return
+        
+        batch = [items[index] for index in indexes]
+        print(f"  [AI] Rewriting {len(batch)} short articles in one request")
+        try:
+            by_id = self._parse_batch_response(self._generate(self._batch_prompt(batch), BATCH_SCHEMA))
+        except Exception as e:
+            # Gemini itself failed (quota, server error): rewrites already in results are kept
+            print(f"❌ AI Processing error: {e}")
+            for index in indexes:
+                results[index] = RewriteResult(title=items[index][0], content=items[index][1], structured=False)
+            return
+        
+        missing = []
+        for n, index in enumerate(indexes, 1):
+            result = _parse_rewrite(by_id.get(str(n))) if by_id else None
+            if result:
+                results[index] = result
+                self._store(self._persian_prompt(*items[index]), result)
+            else:
+                missing.append(index)
         
-        response = self.model.generate_content(prompt)
-        return self._parse_ai_response(response.text)
+        if len(missing) == len(indexes):
+            # Unusable answer: split the batch and try the halves
+            print(f"  [AI] Malformed batch response, splitting {len(indexes)} items")
+            half = len(missing) // 2
+            self._fill_batch(items, missing[:half], results)
+            self._fill_batch(items, missing[half:], results)
+        elif missing:
+            self._fill_batch(items, missing, results)
+    
+    def _parse_batch_response(self, response_text: str) -> Optional[Dict[str, Dict]]:
+        """{id: item} from a JSON array answer; None if it isn't one."""
+        data = self._decode_json(response_text)
+        if not isinstance(data, list):
+            return None
+        return {str(entry.get('id')): entry for entry in data if isinstance(entry, dict)}
+    
+    def _generate(self, prompt: str, schema: Dict) -> str:
+        """One Gemini call in JSON mode, constrained to schema."""
+        config = {'response_mime_type': 'application/json', 'response_schema': schema}
+        return self.executor.run(self.model.generate_content, prompt, generation_config=config).text
+    
+    def _cached(self, prompt: str) -> Optional[RewriteResult]:
+        if not self.cache:
+            return None
+        cached = self.cache.get(self.cache.key(self.model_name, prompt))
+        result = _parse_rewrite(self._decode_json(cached)) if cached is not None else None
+        if result:
+            print("  [AI] Cache hit, reusing previous rewrite")
+        return result
+    
+    def _store(self, prompt: str, result: RewriteResult):
+        if self.cache:
+            data = asdict(result)
+            del data['structured']
+            self.cache.put(self.cache.key(self.model_name, prompt), json.dumps(data, ensure_ascii=False))
     
-    def _parse_ai_response(self, response_text: str) -> Dict:
-        """Parse JSON response from AI"""
-        import json
+    def _rewrite(self, prompt: str) -> RewriteResult:
+        """
+        Validated rewrite for prompt: from the response cache when this exact prompt was
+        answered before, otherwise from Gemini, asking once more if the answer is malformed.
+        """
+        cached = self._cached(prompt)
+        if cached:
+            return cached
         
-        # Clean up response
+        for attempt_prompt in (prompt, prompt + REASK_SUFFIX):
+            result = _parse_rewrite(self._decode_json(self._generate(attempt_prompt, REWRITE_SCHEMA)))
+            if result:
+                self._store(prompt, result)
+                return result
+            print("  [AI] Malformed JSON from Gemini")
+        raise ValueError("Gemini returned malformed JSON twice")
+    
+    @staticmethod
+    def _decode_json(response_text: str):
+        """Decoded JSON from a response (code fences tolerated), or None."""
         text = response_text.strip()
         
         # Remove markdown code blocks if present
         if text.startswith('```'):
             lines = text.split('\n')
-            if lines[0].startswith('```json'):
-                text = '\n'.join(lines[1:-1])
-            else:
-                text = '\n'.join(lines[1:-1])
-        
-        text = text.replace('**', '').replace('##', '')
+            text = '\n'.join(lines[1:-1])
         
         try:
             return json.loads(text)
         except json.JSONDecodeError:
-            # Fallback parsing
-            return {
-                'title': '',
-                'content': response_text,
-                'tags': ['ایران', 'اخبار']
-            }
+            return None
     
     def generate_blog_html(self, news_item: Dict) -> str:
         """Generate HTML content for Blogger post"""
@@ -146,9 +331,9 @@ if __name__ == "__main__":
     }
     
     processor = AIProcessor()
-    processed = processor.process_news(sample_news)
+    processed = processor.process_news(sample_news['title'], sample_news['description'], sample_news['language'])
     
-    print("Processed Title:", processed.get('processed_title'))
-    print("Tags:", processed.get('tags'))
+    print("Processed Title:", processed.title)
+    print("Tags:", processed.tags)
     print("\nHTML Content:")
-    print(processor.generate_blog_html(processed))
+    print(processor.generate_blog_html({'processed_title': processed.title, 'processed_content': processed.content}))
@@ -0,0 +1,425 @@
+"""
+Performance benchmarks for the news bot
+بنچمارک‌های کارایی ربات
+
+Usage:
+    python benchmarks.py duplicates     # DuplicateDetector per-check latency vs history size
+    python benchmarks.py title_recall   # TitleIndex vs brute-force SequenceMatcher on rewritten Persian headlines
+    python benchmarks.py related        # related-posts ranking for a 10k-post blog
+    python benchmarks.py clean_html     # clean_html_content: golden corpus check, lxml vs BeautifulSoup
+    python benchmarks.py article        # article page extraction: compiled registry vs the old if/elif path
+    python benchmarks.py noise          # strip_ai_noise on long AI outputs: one alternation vs per-pattern search
+"""
+
+import os
+import sys
+import glob
+import json
+import random
+import tempfile
+import time
+
+PERSIAN_LETTERS = "ابپتثجچحخدذرزژسشصضطظعغفقکگلمنوهی"
+
+
+def _synthetic_vocabulary(size: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    return ["".join(rng.choice(PERSIAN_LETTERS) for _ in range(rng.randint(2, 7))) for _ in range(size)]
+
+
+def _synthetic_titles(count: int, vocabulary: list, seed: int = 11) -> list:
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(vocabulary) for _ in range(rng.randint(5, 12))) for _ in range(count)]
+
+
+def bench_duplicates(sizes=(1_000, 10_000, 100_000), checks: int = 200):
+    """Per-check latency of DuplicateDetector.is_duplicate for growing history sizes."""
+    from cache_storage import JsonDuplicateStore
+    from duplicate_detector import DuplicateDetector
+
+    vocabulary = _synthetic_vocabulary(3000)
+    queries = _synthetic_titles(checks, vocabulary, seed=99)
+    print(f"{'history':>10} {'load (s)':>10} {'check (ms)':>12}")
+
+    for size in sizes:
+        titles = _synthetic_titles(size, vocabulary)
+        with tempfile.TemporaryDirectory() as tmp:
+            store = JsonDuplicateStore(os.path.join(tmp, "duplicate_cache.json"))
+            detector = DuplicateDetector(store=store)
+            # Fill history directly; mark_as_published would persist after every insert
+            store.full_titles = set(titles)
+            store.seen_urls = {f"https://example.com/news/{i}/" for i in range(size)}
+            store.hashes['url'] = {detector._get_url_hash(u) for u in store.seen_urls}
+            store.hashes['title'] = {detector._get_title_hash(t) for t in titles}
+
+            start = time.perf_counter()
+            detector._build_indexes()
+            load_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for i, title in enumerate(queries):
+                detector.is_duplicate(title, f"https://example.org/new/{i}")
+            check_ms = (time.perf_counter() - start) / len(queries) * 1000
+
+        print(f"{size:>10} {load_seconds:>10.2f} {check_ms:>12.3f}")
+
+
+HEADLINE_SUBJECTS = ["فعال مدنی", "زندانی سیاسی", "معلم بازنشسته", "کارگر معدن", "دانشجوی دانشگاه تهران",
+                     "وکیل دادگستری", "روزنامه‌نگار", "شهروند بهایی", "نوکیش مسیحی", "فعال کارگری", "پرستار"]
+HEADLINE_CITIES = ["تهران", "مشهد", "اصفهان", "شیراز", "تبریز", "کرج", "اهواز", "رشت", "سنندج", "زاهدان", "ارومیه"]
+# (verb, what another outlet would write instead)
+HEADLINE_ACTIONS = [("بازداشت", "دستگیری"), ("محکوم به حبس", "به زندان محکوم"), ("احضار", "فراخوانده"),
+                    ("اعدام", "اجرای حکم اعدام"), ("آزاد", "آزادی"), ("اعتصاب غذا", "اعتصاب"),
+                    ("ضرب و شتم", "مورد ضرب و جرح"), ("ممنوع‌الخروج", "ممنوعیت خروج")]
+HEADLINE_TAILS = ["در زندان اوین", "توسط نیروهای امنیتی", "پس از تجمع اعتراضی", "به اتهام تبلیغ علیه نظام",
+                  "در پی انتشار یک ویدیو", "در دادگاه انقلاب", "بدون دسترسی به وکیل", ""]
+
+
+def _synthetic_headline(rng: random.Random) -> str:
+    subject, city, tail = rng.choice(HEADLINE_SUBJECTS), rng.choice(HEADLINE_CITIES), rng.choice(HEADLINE_TAILS)
+    action = rng.choice(HEADLINE_ACTIONS)[0]
+    forms = [f"{action} یک {subject} در {city} {tail}", f"{subject} {city}ی {action} شد {tail}",
+             f"{action} {rng.choice(['سه', 'پنج', 'هشت', 'ده'])} {subject} در {city} {tail}",
+             f"{city}؛ {subject} {tail} {action} شد"]
+    return " ".join(rng.choice(forms).split())
+
+
+def _rewritten_headline(title: str, rng: random.Random) -> str:
+    """The same story as another outlet headlines it: 1-3 word-level or spelling edits."""
+    words = title.split()
+    for _ in range(rng.randint(1, 3)):
+        edit = rng.random()
+        if edit < 0.2 and len(words) > 4:
+            i = rng.randrange(len(words) - 1)
+            words[i], words[i + 1] = words[i + 1], words[i]
+        elif edit < 0.35:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(["یک", "شهروند", "امروز", "بار دیگر", "فوری:"]))
+        elif edit < 0.5 and len(words) > 4:
+            del words[rng.randrange(len(words))]
+        elif edit < 0.65:
+            text = " ".join(words)
+            for action, synonym in HEADLINE_ACTIONS:
+                if action in text:
+                    text = text.replace(action, synonym, 1)
+                    break
+            words = text.split()
+        elif edit < 0.8:
+            text = " ".join(words)
+            text = text.replace("ی", "ي").replace("ک", "ك") if rng.random() < 0.3 else text.replace("\u200c", " ")
+            words = text.split()
+        else:
+            i = rng.randrange(len(words))
+            if len(words[i]) > 3:
+                j = rng.randrange(len(words[i]))
+                words[i] = words[i][:j] + words[i][j + 1:]
+    return " ".join(words)
+
+
+def _brute_force_similar(normalized: str, history: list, threshold: float) -> bool:
+    """The pre-index check: SequenceMatcher against every title (quick ratios are upper bounds)."""
+    from difflib import SequenceMatcher
+
+    for other in history:
+        matcher = SequenceMatcher(None, normalized, other)
+        if matcher.real_quick_ratio() >= threshold and matcher.quick_ratio() >= threshold \
+                and matcher.ratio() >= threshold:
+            return True
+    return False
+
+
+def bench_title_recall(pairs: int = 5_000, history: int = 1_000, queries: int = 300):
+    """TitleIndex must find every title brute-force SequenceMatcher finds."""
+    from difflib import SequenceMatcher
+    from cache_storage import JsonDuplicateStore
+    from duplicate_detector import DuplicateDetector, TitleIndex
+
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        detector = DuplicateDetector(store=JsonDuplicateStore(os.path.join(tmp, "duplicate_cache.json")))
+    normalize, threshold = detector._normalize_title, detector.similarity_threshold
+    rng = random.Random(5)
+
+    # 1. A near-duplicate outnumbered by titles with the same words in another order
+    query = "بازداشت فعال مدنی در شهر تهران توسط نیروهای امنیتی پس از تجمع اعتراضی"
+    index = TitleIndex()
+    decoys = set()
+    while len(decoys) < 80:
+        words = query.split()
+        rng.shuffle(words)
+        if SequenceMatcher(None, query, " ".join(words)).ratio() < threshold:
+            decoys.add(" ".join(words))
+    for decoy in decoys:
+        index.add(decoy, decoy)
+    typo = "".join(char for i, char in enumerate(query) if i % 7 != 3)
+    index.add(typo, typo)
+    found = index.find_similar(query, threshold)
+    print(f"decoys: {len(decoys)} reordered titles, near-duplicate "
+          f"({SequenceMatcher(None, query, typo).ratio():.2f}) found: {found is not None}")
+    if found is None:
+        failures.append("near-duplicate behind reordered decoys")
+
+    # 2. Shared trigrams of rewritten pairs that brute force calls duplicates
+    fractions = []
+    for _ in range(pairs):
+        original = normalize(_synthetic_headline(rng))
+        rewritten = normalize(_rewritten_headline(original, rng))
+        if SequenceMatcher(None, rewritten, original).ratio() >= threshold:
+            grams = index._grams(rewritten)
+            fractions.append(len(grams & index._grams(original)) / len(grams))
+    below = sum(fraction < index.min_shared for fraction in fractions)
+    print(f"pairs: {len(fractions)} duplicates, min shared trigrams {min(fractions):.2f} "
+          f"(filter {index.min_shared}), below filter: {below}")
+    if below:
+        failures.append(f"{below} duplicate pairs below min_shared")
+
+    # 3. End to end against a brute-force scan of the whole history
+    titles = [_synthetic_headline(rng) for _ in range(history)]
+    index = TitleIndex()
+    for title in titles:
+        index.add(title, normalize(title))
+    normalized_history = list(dict.fromkeys(normalize(title) for title in titles))
+    missed = expected = 0
+    for _ in range(queries):
+        title = _rewritten_headline(rng.choice(titles), rng) if rng.random() < 0.7 else _synthetic_headline(rng)
+        normalized = normalize(title)
+        if _brute_force_similar(normalized, normalized_history, threshold):
+            expected += 1
+            missed += index.find_similar(normalized, threshold) is None
+    print(f"history: {len(normalized_history)} titles, {expected}/{queries} queries have a duplicate, missed: {missed}")
+    if missed:
+        failures.append(f"{missed} duplicates missed against brute force")
+
+    if failures:
+        print("FAILED: " + "; ".join(failures))
+        sys.exit(1)
+
+
+def _synthetic_posts(count: int, seed: int = 5) -> list:
+    rng = random.Random(seed)
+    labels = [f"label-{i}" for i in range(40)]
+    posts = []
+    for i in range(count):
+        post_labels = rng.sample(labels, rng.randint(0, 3))
+        posts.append({
+            'id': str(i),
+            'title': f"post {i}",
+            'url': f"https://example.com/{i}.html",
+            'labels': post_labels,
+            'label': post_labels[0] if post_labels else "حقوق بشر",
+            'image': "",
+            'published': f"2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:00:00Z"
+        })
+    return posts
+
+
+def _related_full_scan(all_posts: list, post: dict) -> list:
+    """The original per-post ranking in update_posts: score every post, sort, take 3."""
+    current_labels = set(post['labels']) if post['labels'] else {post['label']}
+    related_candidates = []
+    for cand in all_posts:
+        if cand['id'] == post['id']:
+            continue
+        cand_labels = set(cand['labels']) if cand['labels'] else {cand['label']}
+        related_candidates.append((len(current_labels.intersection(cand_labels)), cand))
+    related_candidates.sort(key=lambda x: (x[0], x[1]['published']), reverse=True)
+    return [cand for _, cand in related_candidates[:3]]
+
+
+def bench_related(size: int = 10_000, sample: int = 200):
+    """Related-post selection for every post of a synthetic blog: RelatedIndex vs full scan."""
+    from update_all_posts import RelatedIndex
+
+    posts = _synthetic_posts(size)
+
+    start = time.perf_counter()
+    index = RelatedIndex(posts)
+    indexed = [index.top_related(post, 3) for post in posts]
+    index_seconds = time.perf_counter() - start
+
+    # The full scan is quadratic; time a sample and extrapolate
+    rng = random.Random(3)
+    sampled = rng.sample(range(size), sample)
+    start = time.perf_counter()
+    reference = {i: _related_full_scan(posts, posts[i]) for i in sampled}
+    scan_seconds = (time.perf_counter() - start) / sample * size
+
+    mismatches = sum(1 for i in sampled if [p['id'] for p in indexed[i]] != [p['id'] for p in reference[i]])
+    print(f"{'posts':>8} {'index (s)':>10} {'full scan (s, est.)':>20} {'mismatches':>11}")
+    print(f"{size:>8} {index_seconds:>10.2f} {scan_seconds:>20.1f} {mismatches:>8}/{sample}")
+
+
+GOLDEN_CLEAN_HTML = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden", "clean_html")
+
+
+def bench_clean_html(rounds: int = 20):
+    """clean_html_content on the golden corpus: both parsers must match the expected output."""
+    import update_all_posts
+    from update_all_posts import clean_html_content_soup
+
+    implementations = {'soup': clean_html_content_soup}
+    if update_all_posts.HAS_LXML:
+        implementations['lxml'] = update_all_posts.clean_html_content_lxml
+    else:
+        print("lxml is not installed; checking the BeautifulSoup path only")
+
+    corpus = []
+    for html_path in sorted(glob.glob(os.path.join(GOLDEN_CLEAN_HTML, "*.html"))):
+        with open(html_path, 'r', encoding='utf-8') as f:
+            html = f.read()
+        with open(html_path[:-len(".html")] + ".json", 'r', encoding='utf-8') as f:
+            expected = json.load(f)
+        corpus.append((os.path.basename(html_path), html, (expected['body'], expected['main_image'])))
+
+    failures = [(impl, name) for impl, func in implementations.items()
+                for name, html, expected in corpus if func(html) != expected]
+    for impl, name in failures:
+        print(f"[FAIL] {impl}: {name}")
+
+    print(f"{'parser':>8} {'per doc (ms)':>13}")
+    for impl, func in implementations.items():
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for _, html, _ in corpus:
+                func(html)
+        per_doc_ms = (time.perf_counter() - start) / (rounds * len(corpus)) * 1000
+        print(f"{impl:>8} {per_doc_ms:>13.3f}")
+    print(f"golden: {len(corpus) * len(implementations) - len(failures)}/{len(corpus) * len(implementations)} matched")
+    if failures:
+        sys.exit(1)
+
+
+def _synthetic_article_page(paragraphs: int, seed: int = 13) -> str:
+    """A WordPress-style article page: long body with repeated blocks, plus sidebar and footer noise."""
+    rng = random.Random(seed)
+    vocabulary = _synthetic_vocabulary(500)
+    blocks = [" ".join(rng.choice(vocabulary) for _ in range(rng.randint(10, 40))) for _ in range(paragraphs // 2)]
+    tags = [rng.choice(['p', 'p', 'p', 'h2', 'h3']) for _ in range(paragraphs)]
+    body = "".join(f"<{tag}>{rng.choice(blocks)}</{tag}>" for tag in tags)
+    sidebar = "".join(f"<li><a href='/p/{i}'>{rng.choice(blocks)[:60]}</a></li>" for i in range(200))
+    return (
+        "<html><head><meta property='og:image' content='https://www.hra-news.org/up/1.jpg'></head><body>"
+        f"<header><nav><ul>{sidebar}</ul></nav></header>"
+        f"<article><div class='entry-content'><img src='/up/1.jpg'>{body}</div></article>"
+        f"<aside><ul>{sidebar}</ul></aside><footer><p>{blocks[0]}</p></footer></body></html>"
+    )
+
+
+def _article_reference(html: str) -> list:
+    """The original hra-news.org branch of fetch_full_article: html.parser, find_all, list dedup."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    paragraphs = []
+    content_div = soup.find('div', class_='entry-content') or soup.find('div', class_='post-content')
+    if content_div:
+        for p in content_div.find_all(['p', 'h2', 'h3']):
+            text = p.get_text().strip()
+            if len(text) > 50 and 'cookie' not in text.lower() and 'اشتراک' not in text:
+                if text not in paragraphs:
+                    paragraphs.append(text)
+    return paragraphs
+
+
+def bench_article(sizes=(50, 500, 2_000), rounds: int = 5):
+    """Per-page parse + extraction time for fetch_full_article's static path."""
+    from bs4 import BeautifulSoup
+    from article_extractor import ArticleExtractorRegistry, HTML_PARSER
+    from config import ARTICLE_EXTRACTORS, DEFAULT_ARTICLE_EXTRACTOR
+
+    registry = ArticleExtractorRegistry(ARTICLE_EXTRACTORS, DEFAULT_ARTICLE_EXTRACTOR)
+    url = "https://www.hra-news.org/2026/a-12345/"
+    extractor = registry.for_url(url)
+    print(f"parser: {HTML_PARSER}")
+    print(f"{'blocks':>8} {'old (ms)':>10} {'registry (ms)':>14} {'same output':>12}")
+
+    for size in sizes:
+        html = _synthetic_article_page(size)
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            expected = _article_reference(html)
+        old_ms = (time.perf_counter() - start) / rounds * 1000
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            paragraphs, _ = extractor.extract(BeautifulSoup(html, HTML_PARSER), url)
+        new_ms = (time.perf_counter() - start) / rounds * 1000
+
+        print(f"{size:>8} {old_ms:>10.1f} {new_ms:>14.1f} {str(paragraphs == expected):>12}")
+
+
+def _synthetic_ai_output(lines: int, seed: int = 17) -> str:
+    """A long model answer: news sentences with blank lines and some meta-commentary mixed in."""
+    rng = random.Random(seed)
+    vocabulary = _synthetic_vocabulary(500)
+    noise = ["عنوان پیشنهادی: " + vocabulary[0], "نکات سئو:", "گزینه ب: تیتر کوتاه", "محتوا:",
+             "The post " + vocabulary[1] + " first appeared on HRANA.", "چرا؟؟ چون موتورهای جستجو آن را مفید می‌دانند"]
+    output = []
+    for _ in range(lines):
+        roll = rng.random()
+        if roll < 0.1:
+            output.append("")
+        elif roll < 0.2:
+            output.append(rng.choice(noise))
+        else:
+            output.append("  " + " ".join(rng.choice(vocabulary) for _ in range(rng.randint(8, 30))))
+    return "\n".join(output)
+
+
+def _noise_reference(text: str, patterns: list) -> str:
+    """The original strip_ai_noise loop: re.search of '^.*<pattern>.*$' per pattern, per line."""
+    import re
+
+    noise_patterns = [f'^.*{p}.*$' for p in patterns]
+    clean_lines = []
+    for line in text.split('\n'):
+        stripped = line.strip()
+        if not stripped:
+            clean_lines.append(line)
+            continue
+        if not any(re.search(pattern, stripped) for pattern in noise_patterns):
+            clean_lines.append(line)
+    return '\n'.join(clean_lines)
+
+
+def bench_noise(sizes=(50, 500, 5_000), rounds: int = 20):
+    """Per-output time of strip_ai_noise with the bundled pattern file."""
+    from ai_noise import NoiseFilter
+
+    noise_filter = NoiseFilter.from_file()
+    print(f"patterns: {len(noise_filter.patterns)}")
+    print(f"{'lines':>8} {'old (ms)':>10} {'compiled (ms)':>14} {'same output':>12}")
+
+    for size in sizes:
+        text = _synthetic_ai_output(size)
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            expected = _noise_reference(text, noise_filter.patterns)
+        old_ms = (time.perf_counter() - start) / rounds * 1000
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            cleaned = noise_filter.strip(text)
+        new_ms = (time.perf_counter() - start) / rounds * 1000
+
+        print(f"{size:>8} {old_ms:>10.2f} {new_ms:>14.2f} {str(cleaned == expected):>12}")
+
+
+BENCHMARKS = {
+    'duplicates': bench_duplicates,
+    'title_recall': bench_title_recall,
+    'related': bench_related,
+    'clean_html': bench_clean_html,
+    'article': bench_article,
+    'noise': bench_noise,
+}
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"Unknown benchmark: {name} (available: {', '.join(BENCHMARKS)})")
+            sys.exit(1)
+        print(f"\n=== {name} ===")
+        BENCHMARKS[name]()
@@ -2,19 +2,36 @@
 import os
 import pickle
 import base64
+import threading
+import httplib2
+from google_auth_httplib2 import AuthorizedHttp
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 from googleapiclient.discovery import build
-from config import BLOG_ID, GOOGLE_CREDENTIALS_FILE
+from config import (
+    BLOG_ID, GOOGLE_CREDENTIALS_FILE,
+    BLOGGER_REQUESTS_PER_SECOND, BLOGGER_BURST, BLOGGER_MAX_RETRIES, BLOGGER_BACKOFF_MAX_SECONDS
+)
+from rate_limiter import BloggerRateLimiter
 
 SCOPES = ['https://www.googleapis.com/auth/blogger']
 
+# One limiter per process, shared by every BloggerPoster and script
+RATE_LIMITER = BloggerRateLimiter(
+    rate=BLOGGER_REQUESTS_PER_SECOND,
+    burst=BLOGGER_BURST,
+    max_retries=BLOGGER_MAX_RETRIES,
+    max_delay=BLOGGER_BACKOFF_MAX_SECONDS
+)
+
 class BloggerPoster:
     def __init__(self):
         self.blog_id = BLOG_ID
         self.service = None
         self.creds = None
+        self.rate_limiter = RATE_LIMITER
+        self._local = threading.local()
         self._authenticate()
 
     def _authenticate(self):
@@ -41,6 +58,18 @@ class BloggerPoster:
 
         self.service = build('blogger', 'v3', credentials=self.creds)
 
+    def execute(self, request, http=None, idempotent=True):
+        """Run a Blogger API request through the shared rate limiter (retries 429/5xx; only throttling if not idempotent)."""
+        return self.rate_limiter.execute(request, http=http, idempotent=idempotent)
+
+    def thread_http(self):
+        """Authorized transport for the calling thread (httplib2.Http is not thread-safe)."""
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            http = AuthorizedHttp(self.creds, http=httplib2.Http(timeout=60))
+            self._local.http = http
+        return http
+
     def create_post(self, title, content, labels=None, is_draft=False, published_date=None):
         post_body = {
             'kind': 'blogger#post',
@@ -53,15 +82,15 @@ class BloggerPoster:
             post_body['published'] = published_date
             
         try:
-            return self.service.posts().insert(
+            return self.execute(self.service.posts().insert(
                 blogId=self.blog_id, body=post_body, isDraft=is_draft
-            ).execute()
+            ), idempotent=False)
         except Exception as e:
             print(f"[Error] Posting: {e}")
             return None
 
     def publish_draft(self, post_id):
         try:
-            self.service.posts().publish(blogId=self.blog_id, postId=post_id).execute()
+            self.execute(self.service.posts().publish(blogId=self.blog_id, postId=post_id), idempotent=False)
             return True
         except: return False
@@ -0,0 +1,183 @@
+"""
+Concurrent Blogger Post Updates
+به‌روزرسانی هم‌زمان پست‌های Blogger
+
+PostUpdater sends posts().update calls from a bounded worker pool. Every call
+still goes through the shared BloggerRateLimiter token bucket, and each worker
+thread uses its own authorized HTTP transport. When batch_size > 1, updates
+are grouped into BatchHttpRequest calls. If the batch endpoint is rejected,
+the updater falls back to single calls. Results are handed back to the
+caller's thread through poll()/close(), so success and failure bookkeeping
+never runs concurrently.
+
+FailedUpdateQueue persists the ids of posts whose update still failed after
+retries, so the next run retries them first. A post that has failed
+max_attempts runs in a row is dropped from the queue.
+"""
+
+import os
+import json
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from cache_storage import write_json_atomic
+
+FAILED_UPDATES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "failed_updates.json")
+
+
+class FailedUpdateQueue:
+    """{post_id: {'error', 'attempts', 'failed_at'}} kept in failed_updates.json."""
+
+    def __init__(self, path: str = FAILED_UPDATES_FILE, max_attempts: int = 5):
+        self.path = path
+        self.max_attempts = max(1, max_attempts)
+        self.items: Dict[str, Dict] = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.items = json.load(f)
+            except Exception as e:
+                print(f"[WARNING] Error loading {path}: {e}")
+
+    def __contains__(self, post_id: str) -> bool:
+        return post_id in self.items
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def add(self, post_id: str, error: str):
+        """Record a failure; the post is dropped once it has used up its attempts."""
+        entry = self.items.setdefault(post_id, {'attempts': 0})
+        entry['attempts'] += 1
+        entry['error'] = error[:300]
+        entry['failed_at'] = datetime.now().isoformat()
+        if entry['attempts'] >= self.max_attempts:
+            print(f"  [WARNING] Post {post_id} failed {entry['attempts']} times; no longer retrying it")
+            del self.items[post_id]
+
+    def discard(self, post_id: str):
+        self.items.pop(post_id, None)
+
+    def save(self):
+        try:
+            if self.items:
+                write_json_atomic(self.path, self.items, ensure_ascii=False, indent=2)
+            elif os.path.exists(self.path):
+                os.remove(self.path)
+        except Exception as e:
+            print(f"[WARNING] Error saving {self.path}: {e}")
+
+
+class PostUpdater:
+    """Bounded pool of posts().update workers; results come back via poll()/close()."""
+
+    def __init__(self, poster, on_done: Callable[[Dict, Optional[Dict], Optional[Exception]], None],
+                 workers: int = 4, batch_size: int = 10):
+        self.poster = poster
+        self.on_done = on_done
+        self.workers = max(1, workers)
+        self.batch_size = max(1, min(batch_size, 1000))
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='blogger-update')
+        # At most two jobs per worker queued, so rendered HTML doesn't pile up in memory
+        self._slots = threading.BoundedSemaphore(self.workers * 2)
+        self._results = queue.Queue()
+        self._pending: List[Dict] = []
+        self._use_batch = self.batch_size > 1
+
+    def _request(self, job: Dict):
+        return self.poster.service.posts().update(
+            blogId=self.poster.blog_id,
+            postId=job['post_id'],
+            body=job['body']
+        )
+
+    def _finish(self, job: Dict, response: Optional[Dict], error: Optional[Exception]):
+        job['done'] = True
+        self._results.put((job, response, error))
+
+    def _run_single(self, job: Dict, http):
+        try:
+            response = self.poster.execute(self._request(job), http=http)
+            self._finish(job, response, None)
+        except Exception as e:
+            self._finish(job, None, e)
+
+    def _run_batch(self, jobs: List[Dict]):
+        http = self.poster.thread_http()
+        if not self._use_batch or len(jobs) == 1:
+            for job in jobs:
+                self._run_single(job, http)
+            return
+
+        limiter = self.poster.rate_limiter
+        outcomes = {}
+
+        def callback(request_id, response, exception):
+            outcomes[request_id] = (response, exception)
+
+        try:
+            batch = self.poster.service.new_batch_http_request(callback=callback)
+            for index, job in enumerate(jobs):
+                limiter.bucket.acquire()  # each sub-request counts against the quota
+                batch.add(self._request(job), request_id=str(index))
+            batch.execute(http=http)
+        except Exception as e:
+            print(f"  [Batch] Batch request failed ({e}); switching to single updates")
+            self._use_batch = False
+            for job in jobs:
+                self._run_single(job, http)
+            return
+
+        for index, job in enumerate(jobs):
+            response, exception = outcomes.get(str(index), (None, RuntimeError("missing batch response")))
+            if exception is not None and limiter.is_retryable(exception):
+                # Throttled inside the batch: retry alone with backoff
+                limiter.bucket.throttled()
+                self._run_single(job, http)
+            else:
+                self._finish(job, response, exception)
+
+    def _run_jobs(self, jobs: List[Dict]):
+        try:
+            self._run_batch(jobs)
+        except Exception as e:
+            # Never lose a job: anything without a result is reported as failed
+            for job in jobs:
+                if not job.get('done'):
+                    self._finish(job, None, e)
+        finally:
+            self._slots.release()
+
+    def _dispatch(self, jobs: List[Dict]):
+        self._slots.acquire()
+        self._executor.submit(self._run_jobs, jobs)
+
+    def submit(self, post_id: str, body: Dict, context: Optional[Dict] = None):
+        """Queue one update; blocks while the workers are saturated."""
+        self._pending.append({'post_id': post_id, 'body': body, 'context': context or {}})
+        if len(self._pending) >= (self.batch_size if self._use_batch else 1):
+            jobs, self._pending = self._pending, []
+            self._dispatch(jobs)
+        self.poll()
+
+    def poll(self) -> int:
+        """Run on_done for every finished update; returns how many were handled."""
+        handled = 0
+        while True:
+            try:
+                job, response, error = self._results.get_nowait()
+            except queue.Empty:
+                return handled
+            self.on_done(job, response, error)
+            handled += 1
+
+    def close(self) -> int:
+        """Flush the partial batch, wait for all workers and deliver the remaining results."""
+        if self._pending:
+            jobs, self._pending = self._pending, []
+            self._dispatch(jobs)
+        self._executor.shutdown(wait=True)
+        return self.poll()
@@ -0,0 +1,183 @@
+"""
+Persistent Playwright Browser Pool
+یک مرورگر Chromium مشترک برای همه مقالات یک اجرا
+
+One Chromium instance is launched on first use and reused for every article
+in the run. Playwright's async API runs on a private event-loop thread, so the
+pool can be called from any worker thread; page concurrency is capped by a
+semaphore and images/fonts/media are blocked at the network layer.
+"""
+
+import asyncio
+import atexit
+import concurrent.futures
+import threading
+from typing import Dict, Optional
+
+# Try to import playwright for JS-rendered SPA sites (e.g. iranintl.com)
+try:
+    from playwright.async_api import async_playwright
+    HAS_PLAYWRIGHT = True
+except ImportError:
+    HAS_PLAYWRIGHT = False
+    print("[WARNING] playwright not installed. Install with: pip install playwright && playwright install chromium")
+
+# Waiting for a page queued behind others, on top of navigation + settle time
+EXTRACT_GRACE_SECONDS = 15
+START_TIMEOUT_SECONDS = 60
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36'
+BLOCKED_RESOURCE_TYPES = {'image', 'font', 'media'}
+
+CONTENT_SELECTORS_JS = """[
+    '[class*="ArticleBody"]',
+    '[class*="article-body"]',
+    '[class*="story-body"]',
+    'article',
+    '[class*="content"]',
+]"""
+
+# Resolves as soon as the article body has rendered (replaces the fixed 2s sleep)
+CONTENT_READY_JS = """() => {
+    const selectors = %s;
+    return selectors.some(sel => {
+        const el = document.querySelector(sel);
+        return el && el.innerText && el.innerText.length > 200;
+    });
+}""" % CONTENT_SELECTORS_JS
+
+CONTENT_JS = """() => {
+    const selectors = %s;
+    for (const sel of selectors) {
+        const el = document.querySelector(sel);
+        if (el && el.innerText && el.innerText.length > 200) {
+            return el.innerText.trim();
+        }
+    }
+    return document.body ? document.body.innerText.trim() : '';
+}""" % CONTENT_SELECTORS_JS
+
+IMAGE_JS = """() => {
+    const ogImg = document.querySelector('meta[property="og:image"]');
+    if (ogImg) return ogImg.getAttribute('content');
+    const selectors = [
+        '[class*="featured"] img',
+        '[class*="hero"] img',
+        'article img',
+    ];
+    for (const sel of selectors) {
+        const img = document.querySelector(sel);
+        if (img && img.src && img.src.startsWith('http')) {
+            return img.src;
+        }
+    }
+    return null;
+}"""
+
+
+class BrowserPool:
+    """Long-lived Chromium browser/context shared by all page extractions of a run."""
+
+    def __init__(self, page_concurrency: int = 2, block_resources: bool = True, settle_timeout: int = 8000):
+        self.page_concurrency = max(1, page_concurrency)
+        self.block_resources = block_resources
+        self.settle_timeout = settle_timeout
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._playwright = None
+        self._browser = None
+        self._context = None
+        self._semaphore = None
+        atexit.register(self.close)
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._loop:
+                return
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name='playwright-pool', daemon=True)
+            thread.start()
+            future = asyncio.run_coroutine_threadsafe(self._start(), loop)
+            try:
+                future.result(timeout=START_TIMEOUT_SECONDS)
+            except Exception:
+                future.cancel()
+                loop.call_soon_threadsafe(loop.stop)
+                thread.join(timeout=5)
+                raise
+            self._loop, self._thread = loop, thread
+
+    async def _start(self):
+        self._playwright = await async_playwright().start()
+        try:
+            self._browser = await self._playwright.chromium.launch(
+                headless=True, args=['--no-sandbox', '--disable-setuid-sandbox']
+            )
+            self._context = await self._browser.new_context(user_agent=USER_AGENT, locale='fa-IR')
+            if self.block_resources:
+                await self._context.route('**/*', self._route)
+        except BaseException:
+            # Failed (or cancelled) half-way: don't leave the playwright driver running
+            await self._shutdown()
+            raise
+        self._semaphore = asyncio.Semaphore(self.page_concurrency)
+
+    async def _route(self, route):
+        if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _extract(self, url: str, timeout: int) -> Dict:
+        async with self._semaphore:
+            page = await self._context.new_page()
+            try:
+                await page.goto(url, wait_until='domcontentloaded', timeout=timeout)
+                try:
+                    await page.wait_for_function(CONTENT_READY_JS, timeout=self.settle_timeout)
+                except Exception:
+                    pass
+                content = await page.evaluate(CONTENT_JS)
+                image = await page.evaluate(IMAGE_JS)
+            finally:
+                await page.close()
+        return {'content': content or '', 'image': image}
+
+    def extract(self, url: str, timeout: int = 15000) -> Dict:
+        """Render `url` and return {'content': innerText, 'image': og/hero image}. Thread-safe."""
+        self._ensure_started()
+        future = asyncio.run_coroutine_threadsafe(self._extract(url, timeout), self._loop)
+        deadline = (timeout + self.settle_timeout) / 1000 + EXTRACT_GRACE_SECONDS
+        try:
+            return future.result(timeout=deadline)
+        except concurrent.futures.TimeoutError:
+            # Cancels the task on the loop thread, which closes the page
+            future.cancel()
+            raise TimeoutError(f"Rendering {url} took longer than {deadline:.0f}s")
+
+    async def _shutdown(self):
+        try:
+            if self._context:
+                await self._context.close()
+            if self._browser:
+                await self._browser.close()
+        finally:
+            if self._playwright:
+                await self._playwright.stop()
+            self._playwright = self._browser = self._context = None
+
+    def close(self):
+        """Shut the browser down; the next extract() starts a fresh one."""
+        with self._lock:
+            if not self._loop:
+                return
+            try:
+                asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(timeout=30)
+            except Exception as e:
+                print(f"[BrowserPool] Error closing browser: {e}")
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+            if not self._thread.is_alive():
+                self._loop.close()
+            self._loop = None
+            self._thread = None
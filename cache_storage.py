@@ -0,0 +1,493 @@
+"""
+Cache Storage Backends
+لایه ذخیره‌سازی حافظه ربات (JSON یا SQLite)
+
+DuplicateDetector and NewsFetcher persist what they have already seen through
+a small store interface, selected with CACHE_BACKEND:
+
+- "json":   the original whole-file caches (duplicate_cache.json, news_cache.json)
+- "sqlite": one indexed database for both; each mark is a single INSERT,
+            lookups are indexed queries and TTL cleanup is a DELETE, so startup
+            time and write cost no longer grow with the history size.
+
+The first time the SQLite database is opened it imports the existing JSON
+caches (one-shot migration).
+"""
+
+import os
+import json
+import time
+import atexit
+import sqlite3
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from config import (
+    CACHE_BACKEND, CACHE_DB_FILE, CACHE_TTL_DAYS, DUPLICATE_FUZZY_WINDOW_DAYS,
+    SEEN_CACHE_FLUSH_EVERY, SEEN_CACHE_FLUSH_SECONDS
+)
+
+HASH_KINDS = ('title', 'url', 'content')
+
+
+def write_json_atomic(path: str, data, **dump_kwargs):
+    """Write JSON to a temp file in the same directory and rename it over `path`."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, **dump_kwargs)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+# ==================== JSON backend ====================
+
+class JsonDuplicateStore:
+    """Whole-file JSON store used by DuplicateDetector (original format)."""
+
+    def __init__(self, cache_file: str = "duplicate_cache.json"):
+        self.cache_file = cache_file
+        self.hashes = {kind: set() for kind in HASH_KINDS}
+        self.full_titles = set()
+        self.seen_urls = set()
+        self.published_entries: List[Dict] = []
+        self.last_updated = None
+        self._load()
+
+    def _load(self):
+        if os.path.exists(self.cache_file):
+            try:
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                    self.hashes['title'] = set(data.get('title_hashes', []))
+                    self.hashes['url'] = set(data.get('url_hashes', []))
+                    self.hashes['content'] = set(data.get('content_hashes', []))
+                    self.full_titles = set(data.get('full_titles', []))
+                    self.seen_urls = set(data.get('seen_urls', []))
+                    self.published_entries = data.get('published_entries', [])
+                    self.last_updated = data.get('last_updated')
+            except Exception as e:
+                print(f"[DuplicateDetector] Error loading cache: {e}")
+
+    def _save(self):
+        try:
+            data = {
+                'title_hashes': list(self.hashes['title']),
+                'url_hashes': list(self.hashes['url']),
+                'content_hashes': list(self.hashes['content']),
+                'full_titles': list(self.full_titles)[-1000:],  # Keep last 1000
+                'seen_urls': list(self.seen_urls)[-1000:],
+                'published_entries': self.published_entries[-500:],  # Keep last 500
+                'last_updated': datetime.now().isoformat()
+            }
+            with open(self.cache_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+        except Exception as e:
+            print(f"[DuplicateDetector] Error saving cache: {e}")
+
+    def has_hash(self, kind: str, value: str) -> bool:
+        return value in self.hashes[kind]
+
+    def fuzzy_titles(self) -> List[str]:
+        """Titles to load into the fuzzy-match index."""
+        titles = list(self.full_titles)
+        titles.extend(e.get('title', '') for e in self.published_entries if e.get('title'))
+        return titles
+
+    def add_published(self, title: str, url: str, title_hash: str, url_hash: str,
+                      content_hash: Optional[str], post_id: str, timestamp: str):
+        self.hashes['title'].add(title_hash)
+        self.hashes['url'].add(url_hash)
+        if content_hash:
+            self.hashes['content'].add(content_hash)
+        self.full_titles.add(title)
+        self.seen_urls.add(url)
+        self.published_entries.append({
+            'title': title,
+            'url': url,
+            'post_id': post_id,
+            'timestamp': timestamp
+        })
+        self._save()
+
+    def prune_entries(self, cutoff: datetime):
+        self.published_entries = [
+            e for e in self.published_entries
+            if datetime.fromisoformat(e.get('timestamp', datetime.now().isoformat())) > cutoff
+        ]
+        self._save()
+
+    def stats(self) -> Dict:
+        return {
+            'total_titles': len(self.full_titles),
+            'total_urls': len(self.seen_urls),
+            'total_entries': len(self.published_entries),
+            'title_hashes': len(self.hashes['title']),
+            'content_hashes': len(self.hashes['content'])
+        }
+
+
+class JsonSeenStore:
+    """
+    JSON store used by NewsFetcher (original news_cache.json format), write-behind.
+
+    Each mark is appended to `<cache_file>.journal` (one JSON line, fsynced) and
+    only kept in memory otherwise; the snapshot is rewritten atomically
+    (temp file + rename) every `flush_every` marks, after `flush_seconds`, and on
+    flush()/close()/interpreter exit, after which the journal is truncated.
+    A crash between flushes loses nothing: the journal is replayed on load and
+    a half-written last line is ignored.
+    """
+
+    def __init__(self, cache_file: str = "news_cache.json",
+                 flush_every: int = 25, flush_seconds: int = 300):
+        self.cache_file = cache_file
+        self.journal_file = cache_file + ".journal"
+        self.flush_every = max(1, flush_every)
+        self.flush_seconds = flush_seconds
+        self.seen_ids = set()
+        self.seen_titles = set()
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._journal = None
+        self._load()
+        atexit.register(self.close)
+
+    def _load(self):
+        if os.path.exists(self.cache_file):
+            try:
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                    self.seen_ids = set(data.get('seen_ids', []))
+                    self.seen_titles = set(data.get('seen_titles', []))
+            except: pass
+        self._replay_journal()
+
+    def _replay_journal(self):
+        if not os.path.exists(self.journal_file):
+            return
+        replayed = 0
+        try:
+            with open(self.journal_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # torn write from a crash
+                    self.seen_ids.add(entry.get('id'))
+                    self.seen_titles.add(entry.get('title'))
+                    replayed += 1
+        except Exception as e:
+            print(f"Error reading cache journal: {e}")
+        if replayed:
+            self._pending = replayed
+            print(f"[Cache] Replayed {replayed} journaled marks from {self.journal_file}")
+
+    def _append_journal(self, news_id: str, title: str):
+        if self._journal is None:
+            self._journal = open(self.journal_file, 'a', encoding='utf-8')
+            if self._journal.tell() > 0:
+                self._journal.write("\n")  # terminate a possibly torn last line
+        self._journal.write(json.dumps({'id': news_id, 'title': title}, ensure_ascii=False) + "\n")
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+
+    def _save(self):
+        data = {
+            'seen_ids': list(self.seen_ids),
+            'seen_titles': list(self.seen_titles)
+        }
+        try:
+            write_json_atomic(self.cache_file, data, ensure_ascii=False)
+        except Exception as e:
+            print(f"Error saving cache: {e}")
+            return False
+        # Snapshot now holds everything the journal did
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        try:
+            os.remove(self.journal_file)
+        except FileNotFoundError:
+            pass
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        return True
+
+    def contains(self, news_id: str, title: str) -> bool:
+        return news_id in self.seen_ids or title in self.seen_titles
+
+    def add(self, news_id: str, title: str):
+        with self._lock:
+            self.seen_ids.add(news_id)
+            self.seen_titles.add(title)
+            try:
+                self._append_journal(news_id, title)
+            except Exception as e:
+                print(f"Error writing cache journal: {e}")
+            self._pending += 1
+            if (self._pending >= self.flush_every
+                    or time.monotonic() - self._last_flush >= self.flush_seconds):
+                self._save()
+
+    def flush(self):
+        """Persist buffered marks now (run end)."""
+        with self._lock:
+            if self._pending:
+                self._save()
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+
+# ==================== SQLite backend ====================
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS dup_hashes (
+    kind TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    added_at TEXT NOT NULL,
+    PRIMARY KEY (kind, hash)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_dup_hashes_added ON dup_hashes(added_at);
+CREATE TABLE IF NOT EXISTS dup_titles (
+    title TEXT PRIMARY KEY,
+    added_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_dup_titles_added ON dup_titles(added_at);
+CREATE TABLE IF NOT EXISTS dup_urls (
+    url TEXT PRIMARY KEY,
+    added_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_dup_urls_added ON dup_urls(added_at);
+CREATE TABLE IF NOT EXISTS dup_entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT,
+    url TEXT,
+    post_id TEXT,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_dup_entries_timestamp ON dup_entries(timestamp);
+CREATE TABLE IF NOT EXISTS seen_ids (
+    news_id TEXT PRIMARY KEY,
+    added_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_seen_ids_added ON seen_ids(added_at);
+CREATE TABLE IF NOT EXISTS seen_titles (
+    title TEXT PRIMARY KEY,
+    added_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_seen_titles_added ON seen_titles(added_at);
+"""
+
+TTL_TABLES = {
+    'dup_hashes': 'added_at',
+    'dup_titles': 'added_at',
+    'dup_urls': 'added_at',
+    'dup_entries': 'timestamp',
+    'seen_ids': 'added_at',
+    'seen_titles': 'added_at',
+}
+
+
+class SQLiteStore:
+    """
+    Indexed SQLite store implementing both the duplicate-detector and the
+    seen-news interfaces. Safe to share between threads.
+    """
+
+    def __init__(self, db_file: str = "bot_cache.db", ttl_days: int = 180, fuzzy_window_days: int = 90):
+        self.db_file = db_file
+        self.ttl_days = ttl_days
+        self.fuzzy_window_days = fuzzy_window_days
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_file, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SQLITE_SCHEMA)
+
+    def _query_one(self, sql: str, params: tuple = ()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()
+
+    def _write(self, statements: List[tuple]):
+        """Run (sql, params) statements in one transaction."""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                for sql, params in statements:
+                    self._conn.execute(sql, params)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    # ---------- maintenance ----------
+
+    def migrate_from_json(self, duplicate_cache_file: str, news_cache_file: str):
+        """One-shot import of the legacy JSON caches (skipped once done)."""
+        if self._query_one("SELECT 1 FROM meta WHERE key = 'json_migrated'"):
+            return
+
+        dup = JsonDuplicateStore(duplicate_cache_file)
+        seen = JsonSeenStore(news_cache_file)
+        imported_at = dup.last_updated or datetime.now().isoformat()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                for kind in HASH_KINDS:
+                    self._conn.executemany(
+                        "INSERT OR IGNORE INTO dup_hashes (kind, hash, added_at) VALUES (?, ?, ?)",
+                        [(kind, h, imported_at) for h in dup.hashes[kind]]
+                    )
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO dup_titles (title, added_at) VALUES (?, ?)",
+                    [(t, imported_at) for t in dup.full_titles]
+                )
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO dup_urls (url, added_at) VALUES (?, ?)",
+                    [(u, imported_at) for u in dup.seen_urls]
+                )
+                self._conn.executemany(
+                    "INSERT INTO dup_entries (title, url, post_id, timestamp) VALUES (?, ?, ?, ?)",
+                    [(e.get('title', ''), e.get('url', ''), e.get('post_id', ''), e.get('timestamp') or imported_at)
+                     for e in dup.published_entries]
+                )
+                now = datetime.now().isoformat()
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO seen_ids (news_id, added_at) VALUES (?, ?)",
+                    [(news_id, now) for news_id in seen.seen_ids]
+                )
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO seen_titles (title, added_at) VALUES (?, ?)",
+                    [(title, now) for title in seen.seen_titles]
+                )
+                self._conn.execute("INSERT INTO meta (key, value) VALUES ('json_migrated', ?)", (now,))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        print(f"[Storage] Migrated JSON caches into {self.db_file} "
+              f"({len(dup.full_titles)} titles, {len(dup.published_entries)} entries, {len(seen.seen_ids)} seen ids)")
+
+    def cleanup_expired(self):
+        """TTL cleanup: delete every record older than CACHE_TTL_DAYS."""
+        if self.ttl_days <= 0:
+            return
+        cutoff = (datetime.now() - timedelta(days=self.ttl_days)).isoformat()
+        self._write([(f"DELETE FROM {table} WHERE {column} < ?", (cutoff,)) for table, column in TTL_TABLES.items()])
+
+    def flush(self):
+        """Every write is already committed."""
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ---------- DuplicateDetector interface ----------
+
+    def has_hash(self, kind: str, value: str) -> bool:
+        return self._query_one("SELECT 1 FROM dup_hashes WHERE kind = ? AND hash = ?", (kind, value)) is not None
+
+    def fuzzy_titles(self) -> List[str]:
+        """Only titles inside the fuzzy window are loaded, so startup doesn't scale with history."""
+        sql = "SELECT title FROM dup_titles"
+        params = ()
+        if self.fuzzy_window_days > 0:
+            sql += " WHERE added_at >= ?"
+            params = ((datetime.now() - timedelta(days=self.fuzzy_window_days)).isoformat(),)
+        with self._lock:
+            return [row[0] for row in self._conn.execute(sql, params)]
+
+    def add_published(self, title: str, url: str, title_hash: str, url_hash: str,
+                      content_hash: Optional[str], post_id: str, timestamp: str):
+        statements = [
+            ("INSERT OR IGNORE INTO dup_hashes (kind, hash, added_at) VALUES ('title', ?, ?)", (title_hash, timestamp)),
+            ("INSERT OR IGNORE INTO dup_hashes (kind, hash, added_at) VALUES ('url', ?, ?)", (url_hash, timestamp)),
+            ("INSERT OR IGNORE INTO dup_titles (title, added_at) VALUES (?, ?)", (title, timestamp)),
+            ("INSERT OR IGNORE INTO dup_urls (url, added_at) VALUES (?, ?)", (url, timestamp)),
+            ("INSERT INTO dup_entries (title, url, post_id, timestamp) VALUES (?, ?, ?, ?)", (title, url, post_id, timestamp)),
+        ]
+        if content_hash:
+            statements.append(
+                ("INSERT OR IGNORE INTO dup_hashes (kind, hash, added_at) VALUES ('content', ?, ?)", (content_hash, timestamp))
+            )
+        self._write(statements)
+
+    def prune_entries(self, cutoff: datetime):
+        self._write([("DELETE FROM dup_entries WHERE timestamp <= ?", (cutoff.isoformat(),))])
+
+    def stats(self) -> Dict:
+        with self._lock:
+            count = lambda sql: self._conn.execute(sql).fetchone()[0]
+            return {
+                'total_titles': count("SELECT COUNT(*) FROM dup_titles"),
+                'total_urls': count("SELECT COUNT(*) FROM dup_urls"),
+                'total_entries': count("SELECT COUNT(*) FROM dup_entries"),
+                'title_hashes': count("SELECT COUNT(*) FROM dup_hashes WHERE kind = 'title'"),
+                'content_hashes': count("SELECT COUNT(*) FROM dup_hashes WHERE kind = 'content'")
+            }
+
+    # ---------- NewsFetcher interface ----------
+
+    def contains(self, news_id: str, title: str) -> bool:
+        return self._query_one(
+            "SELECT 1 FROM seen_ids WHERE news_id = ? UNION ALL SELECT 1 FROM seen_titles WHERE title = ? LIMIT 1",
+            (news_id, title)
+        ) is not None
+
+    def add(self, news_id: str, title: str):
+        now = datetime.now().isoformat()
+        self._write([
+            ("INSERT OR IGNORE INTO seen_ids (news_id, added_at) VALUES (?, ?)", (news_id, now)),
+            ("INSERT OR IGNORE INTO seen_titles (title, added_at) VALUES (?, ?)", (title, now)),
+        ])
+
+
+# ==================== Factories ====================
+
+_sqlite_store: Optional[SQLiteStore] = None
+_sqlite_lock = threading.Lock()
+
+
+def get_sqlite_store() -> SQLiteStore:
+    """Process-wide SQLite store shared by the detector and the fetcher."""
+    global _sqlite_store
+    with _sqlite_lock:
+        if _sqlite_store is None:
+            store = SQLiteStore(CACHE_DB_FILE, ttl_days=CACHE_TTL_DAYS, fuzzy_window_days=DUPLICATE_FUZZY_WINDOW_DAYS)
+            store.migrate_from_json("duplicate_cache.json", "news_cache.json")
+            store.cleanup_expired()
+            _sqlite_store = store
+        return _sqlite_store
+
+
+def open_duplicate_store(cache_file: str = "duplicate_cache.json"):
+    if CACHE_BACKEND == 'sqlite':
+        return get_sqlite_store()
+    return JsonDuplicateStore(cache_file)
+
+
+def open_seen_store(cache_file: str = "news_cache.json"):
+    if CACHE_BACKEND == 'sqlite':
+        return get_sqlite_store()
+    return JsonSeenStore(cache_file, flush_every=SEEN_CACHE_FLUSH_EVERY, flush_seconds=SEEN_CACHE_FLUSH_SECONDS)
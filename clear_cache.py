@@ -12,4 +12,12 @@ def delete_cache(filename):
 
 delete_cache("duplicate_cache.json")
 delete_cache("news_cache.json")
+delete_cache("news_cache.json.journal")
+delete_cache("related_index.json")
+delete_cache("http_cache.json")
+delete_cache("fetch_routes.json")
+delete_cache("ai_cache.json")
+# SQLite backend (CACHE_BACKEND=sqlite) and its WAL side files
+for suffix in ("", "-wal", "-shm"):
+    delete_cache(f"bot_cache.db{suffix}")
 print("✅ حافظه ربات (کش) به طور کامل پاک شد.")
@@ -11,57 +11,102 @@ Features:
 6. Time-based duplicate window
 """
 
-import os
 import re
-import json
+import math
 import hashlib
 from datetime import datetime, timedelta
 from typing import Set, Dict, List, Optional
+from collections import Counter
 from difflib import SequenceMatcher
 
+from cache_storage import open_duplicate_store
+
+class TitleIndex:
+    """
+    Character n-gram (shingle) inverted index over normalized titles.
+    Fuzzy lookups only verify titles that share enough n-grams with the query,
+    so SequenceMatcher no longer runs over the whole title history.
+    """
+
+    def __init__(self, ngram_size: int = 3, min_shared: float = 0.3):
+        self.ngram_size = ngram_size
+        # Fraction of the query's n-grams a title must share to be compared at all.
+        # SequenceMatcher gives no worst-case bound: it also counts matching blocks
+        # shorter than an n-gram (one inserted letter every two letters keeps ratio 0.8
+        # with no shared trigram). For headline rewrites (reordered, added or dropped
+        # words, synonyms, typos, ی/ي and half-space variants) `benchmarks.py title_recall`
+        # checks this value against a brute-force SequenceMatcher scan.
+        self.min_shared = min_shared
+        self._postings: Dict[str, List[int]] = {}
+        self._titles: List[str] = []
+        self._normalized: List[str] = []
+        self._ids: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._titles)
+
+    def _grams(self, text: str) -> Set[str]:
+        padded = f" {text} "
+        n = self.ngram_size
+        if len(padded) <= n:
+            return {padded}
+        return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+    def add(self, title: str, normalized: str):
+        if not normalized or normalized in self._ids:
+            return
+        doc_id = len(self._titles)
+        grams = self._grams(normalized)
+        self._ids[normalized] = doc_id
+        self._titles.append(title)
+        self._normalized.append(normalized)
+        for gram in grams:
+            self._postings.setdefault(gram, []).append(doc_id)
+
+    def find_similar(self, normalized: str, threshold: float) -> Optional[tuple]:
+        """Return (similarity, original_title) of the best-ranked indexed title >= threshold, else None."""
+        grams = self._grams(normalized)
+        required = max(1, math.ceil(len(grams) * self.min_shared))
+
+        # Exact shared-gram count for every title with any gram in common (C-level counting)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._postings.get(gram, ()))
+
+        # Every title passing the shared-gram filter is verified, most shared first; titles
+        # reusing the query's words in another order can outnumber the real duplicate.
+        # SequenceMatcher.ratio() <= 2*min(len)/(len_a+len_b), so lengths alone rule many out
+        candidates = sorted(((count, doc_id) for doc_id, count in shared.items() if count >= required), reverse=True)
+        query_len = len(normalized)
+        for _, doc_id in candidates:
+            other = self._normalized[doc_id]
+            if 2.0 * min(query_len, len(other)) < threshold * (query_len + len(other)):
+                continue
+            matcher = SequenceMatcher(None, normalized, other)
+            # Cheap upper bounds first; ratio() is the expensive part
+            if matcher.real_quick_ratio() < threshold or matcher.quick_ratio() < threshold:
+                continue
+            similarity = matcher.ratio()
+            if similarity >= threshold:
+                return similarity, self._titles[doc_id]
+        return None
+
+
 class DuplicateDetector:
-    def __init__(self, cache_file: str = "duplicate_cache.json"):
+    def __init__(self, cache_file: str = "duplicate_cache.json", store=None):
         self.cache_file = cache_file
-        self.title_hashes: Set[str] = set()
-        self.url_hashes: Set[str] = set()
-        self.content_hashes: Set[str] = set()
-        self.full_titles: Set[str] = set()
-        self.seen_urls: Set[str] = set()
-        self.published_entries: List[Dict] = []  # Full history with timestamps
+        # Persistent history (JSON file or SQLite, see cache_storage / CACHE_BACKEND)
+        self.store = store if store is not None else open_duplicate_store(cache_file)
         self.similarity_threshold = 0.75  # 75% similarity = duplicate
-        self._load_cache()
+        self.title_index = TitleIndex()
+        self._build_indexes()
     
-    def _load_cache(self):
-        """Load cache from file"""
-        if os.path.exists(self.cache_file):
-            try:
-                with open(self.cache_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.title_hashes = set(data.get('title_hashes', []))
-                    self.url_hashes = set(data.get('url_hashes', []))
-                    self.content_hashes = set(data.get('content_hashes', []))
-                    self.full_titles = set(data.get('full_titles', []))
-                    self.seen_urls = set(data.get('seen_urls', []))
-                    self.published_entries = data.get('published_entries', [])
-            except Exception as e:
-                print(f"[DuplicateDetector] Error loading cache: {e}")
-    
-    def _save_cache(self):
-        """Save cache to file"""
-        try:
-            data = {
-                'title_hashes': list(self.title_hashes),
-                'url_hashes': list(self.url_hashes),
-                'content_hashes': list(self.content_hashes),
-                'full_titles': list(self.full_titles)[-1000:],  # Keep last 1000
-                'seen_urls': list(self.seen_urls)[-1000:],
-                'published_entries': self.published_entries[-500:],  # Keep last 500
-                'last_updated': datetime.now().isoformat()
-            }
-            with open(self.cache_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"[DuplicateDetector] Error saving cache: {e}")
+    def _build_indexes(self):
+        """Normalize and index known titles once at load; mark_as_published keeps the index current."""
+        self.title_index = TitleIndex()
+        for title in self.store.fuzzy_titles():
+            if title:
+                self.title_index.add(title, self._normalize_title(title))
     
     def _normalize_title(self, title: str) -> str:
         """Normalize title for comparison"""
@@ -110,92 +155,56 @@ class DuplicateDetector:
         Check if news item is duplicate
         Returns: (is_duplicate: bool, reason: str)
         """
-        # 1. Check exact URL match
-        url_hash = self._get_url_hash(url)
-        if url_hash in self.url_hashes:
+        # 1. Check exact URL match (hash of the normalized URL)
+        if self.store.has_hash('url', self._get_url_hash(url)):
             return True, "URL already seen"
         
-        if url in self.seen_urls or self._normalize_url(url) in [self._normalize_url(u) for u in self.seen_urls]:
-            return True, "URL already published"
-        
-        # 2. Check exact title hash
-        title_hash = self._get_title_hash(title)
-        if title_hash in self.title_hashes:
-            return True, "Exact title match"
-        
-        # 3. Check title in full titles set
+        # 2. Check exact title match (hash of the normalized title)
         normalized_title = self._normalize_title(title)
-        if normalized_title in [self._normalize_title(t) for t in self.full_titles]:
-            return True, "Title already exists"
+        title_hash = hashlib.md5(normalized_title.encode()).hexdigest()
+        if self.store.has_hash('title', title_hash):
+            return True, "Exact title match"
         
-        # 4. Check title similarity (fuzzy matching)
-        for existing_title in list(self.full_titles)[-200:]:  # Check last 200
-            similarity = self._title_similarity(title, existing_title)
-            if similarity >= self.similarity_threshold:
-                return True, f"Similar title ({similarity:.0%}): {existing_title[:50]}..."
+        # 3. Check title similarity (fuzzy matching) against the whole indexed history
+        match = self.title_index.find_similar(normalized_title, self.similarity_threshold)
+        if match:
+            similarity, existing_title = match
+            return True, f"Similar title ({similarity:.0%}): {existing_title[:50]}..."
         
-        # 5. Check content hash (if content provided)
+        # 4. Check content hash (if content provided)
         if content and len(content) > 100:
             content_hash = self._get_content_hash(content)
-            if content_hash in self.content_hashes:
+            if self.store.has_hash('content', content_hash):
                 return True, "Content fingerprint match"
         
-        # 6. Check against recent entries (last 24 hours)
-        now = datetime.now()
-        for entry in self.published_entries[-100:]:
-            try:
-                entry_time = datetime.fromisoformat(entry.get('timestamp', ''))
-                if now - entry_time > timedelta(hours=48):
-                    continue  # Skip old entries
-                
-                # Check title similarity
-                if self._title_similarity(title, entry.get('title', '')) >= 0.80:
-                    return True, f"Recent similar: {entry.get('title', '')[:40]}..."
-            except:
-                pass
-        
         return False, "OK - New content"
     
     def mark_as_published(self, title: str, url: str, content: str = "", post_id: str = ""):
         """Mark item as published"""
-        # Add to all indexes
-        self.title_hashes.add(self._get_title_hash(title))
-        self.url_hashes.add(self._get_url_hash(url))
-        self.full_titles.add(title)
-        self.seen_urls.add(url)
-        
+        content_hash = None
         if content and len(content) > 100:
-            self.content_hashes.add(self._get_content_hash(content))
-        
-        # Add to published entries with timestamp
-        self.published_entries.append({
-            'title': title,
-            'url': url,
-            'post_id': post_id,
-            'timestamp': datetime.now().isoformat()
-        })
+            content_hash = self._get_content_hash(content)
         
-        # Save to disk
-        self._save_cache()
+        # Persist hashes, title/url and a timestamped entry in one store write
+        self.store.add_published(
+            title=title,
+            url=url,
+            title_hash=self._get_title_hash(title),
+            url_hash=self._get_url_hash(url),
+            content_hash=content_hash,
+            post_id=post_id,
+            timestamp=datetime.now().isoformat()
+        )
+        self.title_index.add(title, self._normalize_title(title))
     
     def get_stats(self) -> Dict:
         """Get duplicate detector statistics"""
-        return {
-            'total_titles': len(self.full_titles),
-            'total_urls': len(self.seen_urls),
-            'total_entries': len(self.published_entries),
-            'title_hashes': len(self.title_hashes),
-            'content_hashes': len(self.content_hashes)
-        }
+        return self.store.stats()
     
     def cleanup_old_entries(self, days: int = 30):
         """Remove entries older than specified days"""
         cutoff = datetime.now() - timedelta(days=days)
-        self.published_entries = [
-            e for e in self.published_entries
-            if datetime.fromisoformat(e.get('timestamp', datetime.now().isoformat())) > cutoff
-        ]
-        self._save_cache()
+        self.store.prune_entries(cutoff)
 
 
 # Test
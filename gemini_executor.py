@@ -0,0 +1,149 @@
+"""
+Quota-Aware Gemini Request Executor
+اجرای هم‌زمان درخواست‌های Gemini با رعایت سهمیه
+
+The pipeline's AI stage rewrites several articles at once from worker
+threads. GeminiExecutor sits in front of every generate_content call and
+keeps them inside the model's quota:
+- requests per minute: the same TokenBucket the Blogger limiter uses
+- tokens per minute: a sliding 60s window of estimated, later actual, usage
+- concurrency: at most `limit` calls in flight. The limit is halved on
+  429 / ResourceExhausted and grows back by one after a run of successes.
+Throttled and transient server errors are retried with full-jitter backoff,
+honouring the retry delay Gemini suggests when it sends one.
+"""
+
+import random
+import re
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+
+from rate_limiter import TokenBucket
+
+try:
+    from google.api_core import exceptions as google_exceptions
+    THROTTLE_ERRORS = (google_exceptions.ResourceExhausted, google_exceptions.TooManyRequests)
+    TRANSIENT_ERRORS = (google_exceptions.ServiceUnavailable, google_exceptions.InternalServerError,
+                        google_exceptions.DeadlineExceeded)
+except ImportError:
+    THROTTLE_ERRORS = ()
+    TRANSIENT_ERRORS = ()
+
+# Persian text is roughly 3 characters per token; the reply is budgeted up front too
+CHARS_PER_TOKEN = 3
+EXPECTED_OUTPUT_TOKENS = 1024
+SUCCESSES_PER_STEP = 5  # successful calls before the concurrency limit grows by one
+SUGGESTED_DELAY = re.compile(r'retry_delay\s*\{\s*seconds:\s*(\d+)|retry in (\d+(?:\.\d+)?)\s*s', re.IGNORECASE)
+
+
+def estimate_tokens(prompt: str) -> int:
+    return len(prompt) // CHARS_PER_TOKEN + EXPECTED_OUTPUT_TOKENS
+
+
+def _suggested_delay(error) -> Optional[float]:
+    """'retry in 17s' / 'retry_delay { seconds: 17 }' from a 429 message, if present."""
+    match = SUGGESTED_DELAY.search(str(error))
+    return float(match.group(1) or match.group(2)) if match else None
+
+
+class TokenWindow:
+    """Tokens spent in the last 60 seconds, with blocking reservation."""
+
+    def __init__(self, tokens_per_minute: int):
+        self.tokens_per_minute = tokens_per_minute
+        self._spent = deque()  # [timestamp, tokens]
+        self._lock = threading.Lock()
+
+    def _used(self, now: float) -> int:
+        while self._spent and now - self._spent[0][0] >= 60:
+            self._spent.popleft()
+        return sum(tokens for _, tokens in self._spent)
+
+    def reserve(self, tokens: int) -> list:
+        """Block until tokens fit in the window; returns the entry for settle()."""
+        # A single request larger than the whole budget is let through once the window is empty
+        tokens = min(tokens, self.tokens_per_minute)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if self._used(now) + tokens <= self.tokens_per_minute:
+                    entry = [now, tokens]
+                    self._spent.append(entry)
+                    return entry
+                wait = 60 - (now - self._spent[0][0]) if self._spent else 1.0
+            time.sleep(max(0.1, wait))
+
+    def settle(self, entry: list, actual_tokens: int):
+        with self._lock:
+            entry[1] = actual_tokens
+
+
+class GeminiExecutor:
+    def __init__(self, requests_per_minute: int = 15, tokens_per_minute: int = 250_000,
+                 max_concurrency: int = 3, max_retries: int = 4, max_delay: float = 60.0):
+        self.bucket = TokenBucket(requests_per_minute / 60.0, burst=max(1, max_concurrency),
+                                  min_rate=1 / 60.0)
+        self.window = TokenWindow(tokens_per_minute)
+        self.max_concurrency = max(1, max_concurrency)
+        self.limit = self.max_concurrency
+        self.max_retries = max_retries
+        self.max_delay = max_delay
+        self._in_flight = 0
+        self._successes = 0
+        self._slots = threading.Condition()
+
+    def _acquire_slot(self):
+        with self._slots:
+            while self._in_flight >= self.limit:
+                self._slots.wait()
+            self._in_flight += 1
+
+    def _release_slot(self, throttled: bool = False, succeeded: bool = False):
+        with self._slots:
+            self._in_flight -= 1
+            if throttled:
+                self.limit = max(1, self.limit // 2)
+                self._successes = 0
+            elif succeeded and self.limit < self.max_concurrency:
+                self._successes += 1
+                if self._successes >= SUCCESSES_PER_STEP:
+                    self.limit += 1
+                    self._successes = 0
+            self._slots.notify_all()
+
+    def run(self, call: Callable, prompt: str, **kwargs):
+        """call(prompt, **kwargs) (e.g. model.generate_content) inside the quota, with retries."""
+        attempt = 0
+        while True:
+            self._acquire_slot()
+            error = None
+            try:
+                self.bucket.acquire()
+                entry = self.window.reserve(estimate_tokens(prompt))
+                response = call(prompt, **kwargs)
+            except Exception as e:
+                error = e
+            throttled = isinstance(error, THROTTLE_ERRORS)
+            self._release_slot(throttled=throttled, succeeded=error is None)
+
+            if error is None:
+                usage = getattr(response, 'usage_metadata', None)
+                total = getattr(usage, 'total_token_count', None)
+                if total:
+                    self.window.settle(entry, total)
+                self.bucket.succeeded()
+                return response
+            if not (throttled or isinstance(error, TRANSIENT_ERRORS)) or attempt >= self.max_retries:
+                raise error
+
+            if throttled:
+                self.bucket.throttled()
+            suggested = _suggested_delay(error)
+            delay = min(self.max_delay, suggested if suggested is not None
+                        else random.uniform(0, 2.0 * (2 ** attempt)))
+            attempt += 1
+            print(f"  [AI] {type(error).__name__} from Gemini, retry {attempt}/{self.max_retries} "
+                  f"in {delay:.1f}s (concurrency {self.limit})")
+            time.sleep(delay)
@@ -0,0 +1,87 @@
+"""
+Conditional-Request Cache for Listing Pages and Feeds
+کش درخواست‌های شرطی برای صفحات فهرست و فیدها
+
+For every category page / RSS feed NewsFetcher remembers the ETag and
+Last-Modified validators together with the news items it parsed from that
+response. The next run sends If-None-Match / If-Modified-Since; on
+304 Not Modified the cached items are reused and the page is neither
+downloaded nor parsed again. Entries are evicted least-recently-used once the
+file grows past max_bytes.
+"""
+
+import os
+import json
+import threading
+import time
+from typing import Dict, List, Optional
+
+from cache_storage import write_json_atomic
+
+
+class HttpCache:
+    """{url: {'etag', 'last_modified', 'items', 'size', 'used_at'}} kept in one JSON file."""
+
+    def __init__(self, path: str = "http_cache.json", max_bytes: int = 2 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.entries: Dict[str, Dict] = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except Exception as e:
+                print(f"[WARNING] Error loading {path}: {e}")
+
+    def get(self, url: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self.entries.get(url)
+            if entry is not None:
+                entry['used_at'] = time.time()
+                self._dirty = True
+            return entry
+
+    @staticmethod
+    def conditional_headers(entry: Optional[Dict]) -> Dict[str, str]:
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def store(self, url: str, response, items: List[Dict]):
+        """Remember the validators of a 200 response and the items parsed from it."""
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        with self._lock:
+            if not etag and not last_modified:
+                # Nothing to revalidate with; don't keep a stale entry around
+                if self.entries.pop(url, None) is not None:
+                    self._dirty = True
+                return
+            entry = {'etag': etag, 'last_modified': last_modified, 'items': items, 'used_at': time.time()}
+            entry['size'] = len(json.dumps(entry, ensure_ascii=False).encode('utf-8'))
+            self.entries[url] = entry
+            self._evict()
+            self._dirty = True
+
+    def _evict(self):
+        total = sum(entry.get('size', 0) for entry in self.entries.values())
+        for url in sorted(self.entries, key=lambda u: self.entries[u].get('used_at', 0)):
+            if total <= self.max_bytes:
+                break
+            total -= self.entries.pop(url).get('size', 0)
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            try:
+                write_json_atomic(self.path, self.entries, ensure_ascii=False)
+                self._dirty = False
+            except Exception as e:
+                print(f"[WARNING] Error saving {self.path}: {e}")
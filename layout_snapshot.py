@@ -0,0 +1,86 @@
+"""
+Layout Snapshot for Incremental Re-layout
+تصویر محلی از وضعیت چیدمان پست‌ها برای به‌روزرسانی افزایشی
+
+update_all_posts --incremental keeps, per post, the metadata the related-posts
+ranking needs (title, url, labels, image, published), Blogger's `updated`
+timestamp, a digest of the stored content and a signature of the related
+posts its widget currently shows. The next run only lists posts updated since
+`last_sync`, plus the ids of all live posts so that deleted or unpublished
+posts are forgotten, and only rebuilds posts that changed or whose neighbour
+set did.
+"""
+
+import os
+import json
+from datetime import datetime
+from typing import Dict, Optional
+
+from cache_storage import write_json_atomic
+
+SNAPSHOT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "layout_snapshot.json")
+METADATA_FIELDS = ('id', 'title', 'url', 'labels', 'label', 'image', 'published')
+
+
+def parse_timestamp(value: str) -> Optional[datetime]:
+    """Blogger RFC 3339 timestamp ('...Z' or '...-07:00') -> aware datetime."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+
+class LayoutSnapshot:
+    def __init__(self, path: str = SNAPSHOT_FILE):
+        self.path = path
+        self.last_sync: Optional[str] = None
+        self.posts: Dict[str, Dict] = {}
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.last_sync = data.get('last_sync')
+            self.posts = data.get('posts', {})
+        except Exception as e:
+            print(f"[WARNING] Error loading {self.path}: {e}")
+
+    def save(self):
+        try:
+            write_json_atomic(self.path, {'last_sync': self.last_sync, 'posts': self.posts}, ensure_ascii=False)
+        except Exception as e:
+            print(f"[WARNING] Error saving {self.path}: {e}")
+
+    def reset(self):
+        self.last_sync = None
+        self.posts = {}
+
+    def ready(self) -> bool:
+        return bool(self.posts) and parse_timestamp(self.last_sync) is not None
+
+    def advance(self, updated: str):
+        """Move last_sync forward to a server-side `updated` timestamp we have seen."""
+        seen = parse_timestamp(updated)
+        current = parse_timestamp(self.last_sync)
+        if seen and (current is None or seen > current):
+            self.last_sync = updated
+
+    def record(self, post: Dict, updated: Optional[str] = None, digest: Optional[str] = None,
+               related: Optional[str] = None):
+        entry = self.posts.setdefault(post['id'], {})
+        entry.update({field: post.get(field) for field in METADATA_FIELDS})
+        if updated is not None:
+            entry['updated'] = updated
+        if digest is not None:
+            entry['digest'] = digest
+        if related is not None:
+            entry['related'] = related
+
+    def forget(self, post_id: str):
+        """Drop a post that was deleted or reverted to draft."""
+        self.posts.pop(post_id, None)
@@ -122,97 +122,29 @@ def strip_markdown(text):
 
 def strip_ai_noise(text):
     """Remove AI meta-commentary, analysis, and thinking-out-loud lines that should not appear in blog posts."""
-    if not text:
-        return text
-    # Patterns that indicate AI analysis/commentary (not actual news content)
-    noise_patterns = [
-        r'^.*بسیار عالی.*$',
-        r'^.*با توجه به نقش.*$',
-        r'^.*پیشنهادات بازنویسی.*$',
-        r'^.*سناریوی \d.*$',
-        r'^.*عنوان پیشنهادی.*$',
-        r'^.*گزینه [الفب].*$',
-        r'^.*چرا\?\!?\?.*$',
-        r'^.*نکات سئو.*$',
-        r'^.*محتوای پیشنهادی.*$',
-        r'^.*بهینه‌سازی برای جستجو.*$',
-        r'^.*لینک‌سازی داخلی.*$',
-        r'^.*عنوان اصلی \(پیشنهادی.*$',
-        r'^.*تاکید بر فوریت.*$',
-        r'^.*تاکید بر گستردگی.*$',
-        r'^.*ساختار پاراگراف.*$',
-        r'^.*کلمات کلیدی در عنوان.*$',
-        r'^.*قالب‌بندی:.*$',
-        r'^.*خوانایی:.*$',
-        r'^.*first appeared on.*$',
-        r'^.*The post.*appeared.*$',
-        r'^.*بازنویسی می‌کنم.*$',
-        r'^.*تمرکز بر سردبیری.*$',
-        r'^.*مناسب برای تیتر.*$',
-        r'^.*بار دراماتیک.*$',
-        r'^.*مخاطب را به خواندن.*$',
-        r'^.*عنوان:\s*$',
-        r'^.*محتوا:\s*$',
-        r'^.*پیوند اول:.*$',
-        r'^.*اطلاعات تکمیلی:\s*$',
-        r'^.*توضیحات\s*\(Meta Description\).*$',
-        r'^.*در صورتی که خبرگزاری.*$',
-        r'^.*تاریخ انتشار.*در انتهای متن.*$',
-        r'^.*درج واضح منبع.*$',
-        r'^.*استفاده از لیست.*$',
-        r'^.*استفاده از جملات کوتاه.*$',
-        r'^.*عنوان \(Title\).*$',
-        r'^.*عنوان خبری و مستقیم.*$',
-        r'^.*محتوای بازنویسی شده.*$',
-        r'^.*هشدار شدید حقوق بشر.*$',
-        r'^.*عنوان اصلی \(پیشنهادی.*$',
-        r'^.*چرا\?\?.*$',
-        r'^.*گستردگی را نشان.*$',
-        r'^.*احساس فوریت و اهمیت.*$',
-        r'^.*کلمات کلیدی قوی.*$',
-        r'^.*موتورهای جستجو.*مفید.*$',
-        r'^.*کمک می‌کند تا اطلاعات.*$',
-        r'^.*حفظ اعتبار.*$',
-        r'^.*سئو بسیار مهم.*$',
-        r'^.*در یک سناریوی واقعی.*$',
-        r'^.*رعایت شده.*$',
-        r'^.*خبرگزاری در ابتدای.*$',
-        r'^.*اضافه کردن نام.*$',
-        r'^.*توضیح:.*در خروجی بالا.*$',
-        r'^.*در پاراگراف اول پوشش.*$',
-        r'^.*صفحه به صورت ضمنی.*$',
-        r'^.*منابع معتبر.*دیده می‌شود.*$',
-        r'^.*جذابیت یا اطلاعاتی ندارد.*$',
-        r'^.*عبارت به طور معمول.*$',
-        r'^.*حاوی کلمات کلیدی اصلی.*$',
-    ]
-    lines = text.split('\n')
-    clean_lines = []
-    for line in lines:
-        stripped = line.strip()
-        if not stripped:
-            clean_lines.append(line)
-            continue
-        is_noise = False
-        for pattern in noise_patterns:
-            if re.search(pattern, stripped):
-                is_noise = True
-                break
-        if not is_noise:
-            clean_lines.append(line)
-    return '\n'.join(clean_lines)
+    return NOISE_FILTER.strip(text)
 
-from typing import List, Dict
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional
 
 from config import (
     BLOG_ID, 
     MAX_NEWS_PER_CHECK, 
-    CHECK_INTERVAL_HOURS
+    CHECK_INTERVAL_HOURS,
+    PIPELINE_DEPTH,
+    RELATED_INDEX_MAX_POSTS,
+    RELATED_INDEX_TTL_MINUTES,
+    RELATED_INDEX_CACHE_FILE,
+    AI_NOISE_PATTERNS_FILE
 )
 from news_fetcher import NewsFetcher
 from ai_processor import AIProcessor
 from blogger_poster import BloggerPoster
 from duplicate_detector import DuplicateDetector
+from ai_noise import NoiseFilter, DEFAULT_PATTERNS_FILE
+
+NOISE_FILTER = NoiseFilter.from_file(AI_NOISE_PATTERNS_FILE or DEFAULT_PATTERNS_FILE)
 
 class BloggerNewsBot:
     def __init__(self):
@@ -220,6 +152,7 @@ class BloggerNewsBot:
         self.duplicate_detector = DuplicateDetector()  # Advanced duplicate detection
         self.ai = None
         self.blogger = None
+        self.recent_posts = None
         self.resolved_images = {}
         
         print("[INFO] Initializing Blogger News Bot...")
@@ -254,374 +187,410 @@ class BloggerNewsBot:
             except Exception as e:
                 print(f"[ERROR] Blogger initialization failed: {e}")
 
+    def _init_recent_posts(self):
+        """Fresh related-posts index per run (fetched lazily on the first publish)."""
+        if self.blogger:
+            from related_posts import RecentPostsIndex
+            self.recent_posts = RecentPostsIndex(
+                self.blogger,
+                self.resolved_images,
+                max_posts=RELATED_INDEX_MAX_POSTS,
+                cache_file=RELATED_INDEX_CACHE_FILE,
+                ttl_seconds=RELATED_INDEX_TTL_MINUTES * 60
+            )
+
     def fetch_and_process_news(self):
         print("\n" + "="*60)
         print(f"Starting news fetch at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         print("="*60)
         
-        news_items = self.fetcher.fetch_all_news(max_items=MAX_NEWS_PER_CHECK)
-        
-        if not news_items:
-            print("[INFO] No new relevant news found")
-            return
-        
-        self._init_ai()
-        self._init_blogger()
-        
-        
-        published_count = 0
-        posted_titles = []
+        # close() flushes seen marks and route memory and stops the hedge pool and
+        # browser on every exit path, including an empty cycle or a failed init
+        try:
+            news_items = self.fetcher.fetch_all_news(max_items=MAX_NEWS_PER_CHECK)
+            
+            if not news_items:
+                print("[INFO] No new relevant news found")
+                return
+            
+            self._init_ai()
+            self._init_blogger()
+            self._init_recent_posts()
+            
+            published_count = self._run_pipeline(news_items)
+        finally:
+            self.fetcher.close()
+
+        print(f"\nFinished. Published {published_count} items.")
         
-        for item in news_items:
-            try:
-                # 1. TIME FILTER: Skip older than 24h
-                pub_date_str = item.get('published')
-                if pub_date_str:
-                    try:
-                        pub_date = datetime.fromisoformat(pub_date_str)
-                        if datetime.now() - pub_date > timedelta(hours=24):
-                            print(f"  [Skip] News too old ({pub_date.strftime('%Y-%m-%d')}): {item['title'][:50]}")
-                            continue
-                    except:
-                        pass
-                
-                # 2. ADVANCED DUPLICATE CHECK
-                is_dup, dup_reason = self.duplicate_detector.is_duplicate(
-                    item['title'], 
-                    item.get('link', ''),
-                    item.get('description', '')
-                )
-                if is_dup:
-                    safe_title = item['title'][:40].encode(sys.stdout.encoding, errors='replace').decode(sys.stdout.encoding)
-                    print(f"  [SKIP] Duplicate: {safe_title}... ({dup_reason})")
-                    continue
+        # Finally, update the live statistics
+        try:
+            from stats_updater import fetch_and_calculate_stats, update_stats_post
+            print("\n[INFO] Running Live Stats Engine...")
+            stats_data = fetch_and_calculate_stats()
+            if stats_data and self.blogger:
+                update_stats_post(self.blogger, stats_data)
+        except Exception as e:
+            print(f"[Error] Failed to update stats: {e}")
 
-                safe_title = item['title'][:50].encode(sys.stdout.encoding, errors='replace').decode(sys.stdout.encoding)
-                print(f"\nProcessing: {safe_title}...")
-                
-                # Prepare content
-                article_link = item.get('link', '')
-                article_title = item['title']
-                
-                print(f"  [Fetching] Getting full content...")
-                full_article = self.fetcher.fetch_full_article(article_link, item.get('source', ''))
-                
-                # Get content from article or fallback to item description
-                description = full_article.get('full_content', '') if full_article.get('success') else ''
-                if not description:
-                    description = item.get('description', '')
-                
-                main_image = full_article.get('main_image') or item.get('image_url', '')
-                
-                # If still no content, use AI to GENERATE content from title
-                if not description or len(description) < 50:
-                    print(f"  [Warning] No content found, asking AI to generate from title...")
-                    description = f"[این خبر نیاز به تحلیل دارد: {article_title}]"
-
-                # Call AI for Multi-language processing
-                # This also fixes content if it was minimal
-                if self.ai:
-                    print(f"  [AI] Paraphrasing and generating unique title...")
-                    processed_title, ai_response = self.ai.process_news(article_title, description)
-                    
-                    # Update title to the unique one generated by AI
-                    article_title = processed_title
-                    
-                    # Parse AI response - Persian only (no translations)
-                    final_fa = description # Fallback
-                    meta_description = ""
-                    
-                    if "===PERSIAN===" in ai_response:
-                        try:
-                            persian_part = ai_response.split("===PERSIAN===")[1]
-                            # Remove other sections if present
-                            for marker in ["===TAGS===", "===METADESCRIPTION===", "===ENGLISH===", "===GERMAN==="]:
-                                if marker in persian_part:
-                                    persian_part = persian_part.split(marker)[0]
-                            final_fa = persian_part.strip()
-                        except:
-                            pass
-                    elif len(ai_response) > 100: 
-                        # If AI failed to structure but returned long text, use it
-                        final_fa = ai_response
-
-                    if "===METADESCRIPTION===" in ai_response:
-                        try:
-                            meta_part = ai_response.split("===METADESCRIPTION===")[1]
-                            for marker in ["===PERSIAN===", "===TAGS===", "===TITLE==="]:
-                                if marker in meta_part:
-                                    meta_part = meta_part.split(marker)[0]
-                            meta_description = meta_part.strip()
-                        except:
-                            pass
-                    
-                    # CLEAN AI OUTPUT: Remove Markdown symbols and AI analysis noise
-                    final_fa = strip_ai_noise(final_fa)
-                    final_fa = strip_markdown(final_fa)
-                    article_title = strip_markdown(article_title)
-                    meta_description = strip_markdown(meta_description)
-                    
-                    # Ensure meta_description is populated as fallback
-                    if not meta_description:
-                        paragraphs = [p.strip() for p in final_fa.split('\n') if p.strip()]
-                        if paragraphs:
-                            meta_description = paragraphs[0][:160]
-                            if len(paragraphs[0]) > 160:
-                                meta_description += "..."
-                        else:
-                            meta_description = final_fa[:160] + "..."
-                            
-                    description = final_fa
-                else:
+    def _run_pipeline(self, news_items: List[Dict]) -> int:
+        """
+        Staged pipeline: full-article download -> AI rewrite -> publish.
+        Downloads and rewrites for the next PIPELINE_DEPTH items run in worker
+        threads while the current item is being published; the Blogger insert
+        itself stays serialized on this thread, in the original item order.
+        """
+        depth = max(1, PIPELINE_DEPTH)
+        published_count = 0
+        in_flight = deque()
+        pending_items = iter(news_items)
+
+        with ThreadPoolExecutor(max_workers=depth, thread_name_prefix='article') as fetch_pool, \
+                ThreadPoolExecutor(max_workers=depth, thread_name_prefix='ai') as ai_pool:
+
+            def submit_next() -> bool:
+                for item in pending_items:
+                    if not self._should_process(item):
+                        continue
+                    fetched = fetch_pool.submit(self._fetch_stage, item)
+                    in_flight.append(ai_pool.submit(self._ai_stage, fetched))
+                    return True
+                return False
+
+            # Fill the pipeline, then keep it topped up as items are published
+            while len(in_flight) < depth and submit_next():
+                pass
+
+            while in_flight:
+                prepared = in_flight.popleft().result()
+                submit_next()
+                if prepared and self._publish_stage(prepared):
+                    published_count += 1
+
+        return published_count
+
+    def _should_process(self, item: Dict) -> bool:
+        """Cheap pre-checks (age + duplicates) run before any network work."""
+        try:
+            # 1. TIME FILTER: Skip older than 24h
+            pub_date_str = item.get('published')
+            if pub_date_str:
+                try:
+                    pub_date = datetime.fromisoformat(pub_date_str)
+                    if datetime.now() - pub_date > timedelta(hours=24):
+                        print(f"  [Skip] News too old ({pub_date.strftime('%Y-%m-%d')}): {item['title'][:50]}")
+                        return False
+                except:
                     pass
+            
+            # 2. ADVANCED DUPLICATE CHECK
+            if self._is_duplicate_item(item):
+                return False
 
-                # VALIDATE: Skip if no content was extracted
-                if not description or len(description) < 50:
-                    print(f"  [SKIP] No content extracted for this article")
-                    continue
-                
-                # DEDUPLICATION CHECK: Remove any repeated text content
-                description = deduplicate_text(description)
-                
-                print(f"  [Content] {len(description)} characters")
-                
-                source_name = item.get('source', 'Source')
-                search_text = (article_title + " " + description).lower()
+            safe_title = item['title'][:50].encode(sys.stdout.encoding, errors='replace').decode(sys.stdout.encoding)
+            print(f"\nProcessing: {safe_title}...")
+            return True
+        except Exception as e:
+            print(f"[ERROR] Processing item: {e}")
+            return False
+
+    def _is_duplicate_item(self, item: Dict) -> bool:
+        is_dup, dup_reason = self.duplicate_detector.is_duplicate(
+            item['title'], 
+            item.get('link', ''),
+            item.get('description', '')
+        )
+        if is_dup:
+            safe_title = item['title'][:40].encode(sys.stdout.encoding, errors='replace').decode(sys.stdout.encoding)
+            print(f"  [SKIP] Duplicate: {safe_title}... ({dup_reason})")
+        return is_dup
+
+    def _fetch_stage(self, item: Dict) -> Optional[Dict]:
+        """Pipeline stage 1 (worker thread): download the full article."""
+        try:
+            # Prepare content
+            article_link = item.get('link', '')
+            article_title = item['title']
+            
+            print(f"  [Fetching] Getting full content...")
+            full_article = self.fetcher.fetch_full_article(article_link, item.get('source', ''))
+            
+            # Get content from article or fallback to item description
+            description = full_article.get('full_content', '') if full_article.get('success') else ''
+            if not description:
+                description = item.get('description', '')
+            
+            main_image = full_article.get('main_image') or item.get('image_url', '')
+            
+            # If still no content, use AI to GENERATE content from title
+            if not description or len(description) < 50:
+                print(f"  [Warning] No content found, asking AI to generate from title...")
+                description = f"[این خبر نیاز به تحلیل دارد: {article_title}]"
+
+            return {
+                'item': item,
+                'article_link': article_link,
+                'article_title': article_title,
+                'description': description,
+                'main_image': main_image,
+            }
+        except Exception as e:
+            print(f"[ERROR] Processing item: {e}")
+            return None
+
+    def _ai_stage(self, fetched_future) -> Optional[Dict]:
+        """Pipeline stage 2 (worker thread): AI rewrite, cleanup and labelling."""
+        fetched = fetched_future.result()
+        if not fetched:
+            return None
+        try:
+            article_title = fetched['article_title']
+            description = fetched['description']
+            meta_description = ""
+
+            # Call AI for Multi-language processing
+            # This also fixes content if it was minimal
+            if self.ai:
+                print(f"  [AI] Paraphrasing and generating unique title...")
+                rewrite = self.ai.process_news(article_title, description)
                 
-                # ==========================================
-                # 1. Smart Label Classification
-                # ==========================================
-                post_labels = []
-                worker_keywords = ['کارگر', 'کارگران', 'اعتصاب', 'حقوق معوقه', 'سندیکا', 'کولبر', 'سوخت‌بر', 'اخراج', 'بازنشستگان', 'حداقل دستمزد', 'حوادث کار']
-                prisoner_keywords = ['زندان', 'بازداشت', 'اوین', 'اعدام', 'حبس', 'وثیقه', 'سلول انفرادی', 'اعتصاب غذا', 'شکنجه', 'بند نسوان', 'زندانی سیاسی']
+                # Update title to the unique one generated by AI
+                article_title = rewrite.title
+                meta_description = rewrite.meta_description
                 
-                # Check for Worker-related news across all sources
-                if any(kw in search_text for kw in worker_keywords):
-                    post_labels.append('کارگران')
+                # Persian only (no translations); very short rewrites keep the source text
+                use_rewrite = rewrite.structured and len(rewrite.content) > 100
+                final_fa = rewrite.content if use_rewrite else description
                 
-                # Check for Prisoner/Execution-related news across all sources
-                if any(kw in search_text for kw in prisoner_keywords):
-                    post_labels.append('وضعیت زندانیان')
+                # CLEAN AI OUTPUT: validated JSON needs only the Markdown cleanup; the
+                # noise filter is for source text used when the AI gave nothing usable
+                if not use_rewrite:
+                    final_fa = strip_ai_noise(final_fa)
+                final_fa = strip_markdown(final_fa)
+                article_title = strip_markdown(article_title)
+                meta_description = strip_markdown(meta_description)
                 
-                # Fallback to category based on source or general human rights if no specific matches
-                if not post_labels:
-                    if 'ایران اینترنشنال' in source_name:
-                        post_labels.append('بین‌الملل')
+                # Ensure meta_description is populated as fallback
+                if not meta_description:
+                    paragraphs = [p.strip() for p in final_fa.split('\n') if p.strip()]
+                    if paragraphs:
+                        meta_description = paragraphs[0][:160]
+                        if len(paragraphs[0]) > 160:
+                            meta_description += "..."
                     else:
-                        post_labels.append('حقوق بشر')
-                
-                post_labels = list(set(post_labels))
-                
-                # Only use original news image; no fallback/stock images
-                if not main_image:
-                    print(f"  [Image] No original image found — publishing text-only.")
-
-                # ==========================================
-                # 3. Build HTML (with unblocked image proxy & deep SEO)
-                # ==========================================
-                image_html = ""
-                if main_image:
-                    proxied_image = download_and_optimize_image(main_image)
-                    print(f"  [Image] {proxied_image[:60]}...")
-                    # Image SEO: Alt tags, title tags, loading="lazy", decoding="async", and semantic figure markup
-                    image_html = f'''<figure style="margin:0 0 25px 0;text-align:center;">
+                        meta_description = final_fa[:160] + "..."
+                        
+                description = final_fa
+
+            # VALIDATE: Skip if no content was extracted
+            if not description or len(description) < 50:
+                print(f"  [SKIP] No content extracted for this article")
+                return None
+            
+            # DEDUPLICATION CHECK: Remove any repeated text content
+            description = deduplicate_text(description)
+            
+            print(f"  [Content] {len(description)} characters")
+            
+            source_name = fetched['item'].get('source', 'Source')
+            search_text = (article_title + " " + description).lower()
+            
+            # ==========================================
+            # 1. Smart Label Classification
+            # ==========================================
+            post_labels = []
+            worker_keywords = ['کارگر', 'کارگران', 'اعتصاب', 'حقوق معوقه', 'سندیکا', 'کولبر', 'سوخت‌بر', 'اخراج', 'بازنشستگان', 'حداقل دستمزد', 'حوادث کار']
+            prisoner_keywords = ['زندان', 'بازداشت', 'اوین', 'اعدام', 'حبس', 'وثیقه', 'سلول انفرادی', 'اعتصاب غذا', 'شکنجه', 'بند نسوان', 'زندانی سیاسی']
+            
+            # Check for Worker-related news across all sources
+            if any(kw in search_text for kw in worker_keywords):
+                post_labels.append('کارگران')
+            
+            # Check for Prisoner/Execution-related news across all sources
+            if any(kw in search_text for kw in prisoner_keywords):
+                post_labels.append('وضعیت زندانیان')
+            
+            # Fallback to category based on source or general human rights if no specific matches
+            if not post_labels:
+                if 'ایران اینترنشنال' in source_name:
+                    post_labels.append('بین‌الملل')
+                else:
+                    post_labels.append('حقوق بشر')
+            
+            post_labels = list(set(post_labels))
+
+            return dict(
+                fetched,
+                article_title=article_title,
+                description=description,
+                meta_description=meta_description,
+                source_name=source_name,
+                post_labels=post_labels,
+            )
+        except Exception as e:
+            print(f"[ERROR] Processing item: {e}")
+            return None
+
+    def _publish_stage(self, prepared: Dict) -> bool:
+        """Pipeline stage 3 (main thread): build the post HTML and publish it."""
+        try:
+            item = prepared['item']
+            # Items ahead of this one may have been published while it was in flight
+            if self._is_duplicate_item(item):
+                return False
+
+            article_link = prepared['article_link']
+            article_title = prepared['article_title']
+            description = prepared['description']
+            meta_description = prepared['meta_description']
+            main_image = prepared['main_image']
+            source_name = prepared['source_name']
+            post_labels = prepared['post_labels']
+            
+            # Only use original news image; no fallback/stock images
+            if not main_image:
+                print(f"  [Image] No original image found — publishing text-only.")
+
+            # ==========================================
+            # 3. Build HTML (with unblocked image proxy & deep SEO)
+            # ==========================================
+            image_html = ""
+            if main_image:
+                proxied_image = download_and_optimize_image(main_image)
+                print(f"  [Image] {proxied_image[:60]}...")
+                # Image SEO: Alt tags, title tags, loading="lazy", decoding="async", and semantic figure markup
+                image_html = f'''<figure style="margin:0 0 25px 0;text-align:center;">
     <img src="{proxied_image}" alt="{article_title}" title="{article_title}" loading="lazy" decoding="async" style="width:100%;max-width:800px;border-radius:12px;box-shadow:0 5px 20px rgba(0,0,0,0.4);" />
     <figcaption style="display:none;">{article_title}</figcaption>
 </figure>'''
-                else:
-                    print(f"  [Warning] No image found for this article")
-                
-                # Convert text paragraphs into semantic <p> tags for better SEO crawling
-                formatted_paragraphs = []
-                lines = [p.strip() for p in description.split("\n") if p.strip()]
-                
-                if lines:
-                    first_line_clean = lines[0].replace('**', '').replace('تیتر:', '').replace('عنوان:', '').strip()
-                    article_title_clean = article_title.strip()
-                    if article_title_clean in first_line_clean or first_line_clean in article_title_clean:
-                        lines = lines[1:]
-                        
-                for p in lines:
-                    if p != "محتوا:" and not p.startswith("عنوان:") and not p.startswith("تیتر:"):
-                        formatted_paragraphs.append(f'<p style="margin-bottom:18px;">{p}</p>')
-                        
-                description_html = "\n".join(formatted_paragraphs)
-
-                # Generate Google Rich Snippet (Schema.org JSON-LD Structured Data)
-                import json
-                from urllib.parse import quote
-                
-                # Dynamic JSON-LD preparation
-                schema_data = {
-                    "@context": "https://schema.org",
-                    "@type": "NewsArticle",
-                    "headline": article_title,
-                    "image": [main_image] if main_image else [],
-                    "datePublished": datetime.utcnow().isoformat() + "Z",
-                    "dateModified": datetime.utcnow().isoformat() + "Z",
-                    "author": {
-                        "@type": "Organization",
-                        "name": "iranpolnews",
-                        "url": "https://iranpolnews.blogspot.com"
-                    },
-                    "publisher": {
-                        "@type": "Organization",
-                        "name": "iranpolnews",
-                        "logo": {
-                            "@type": "ImageObject",
-                            "url": "https://cdn.jsdelivr.net/gh/AmirCode97/blogger-news-bot@main/images/HHk1ato9bgvQfZFgfsFF.png"
-                        }
-                    },
-                    "description": meta_description
-                }
-                
-                schema_json = json.dumps(schema_data, ensure_ascii=False)
-                schema_script = f'<script type="application/ld+json">{schema_json}</script>'
-
-                # Generate internal category SEO links
-                labels_to_use = post_labels if post_labels else ["حقوق بشر"]
-                tag_links = []
-                for label in labels_to_use:
-                    tag_links.append(f'<a href="/search/label/{quote(label)}" style="color:#c0392b;text-decoration:none;margin-left:12px;font-weight:bold;transition:color 0.2s;" onmouseover="this.style.color=\'#e74c3c\'" onmouseout="this.style.color=\'#c0392b\'">#{label}</a>')
-                tags_html = " ".join(tag_links)
-
-                # Generate "مطالب مرتبط" (Related Posts) widget dynamically for new post
-                related_widget_html = ""
-                try:
-                    from update_all_posts import extract_first_image, get_persian_date, build_related_posts_widget
-                    
-                    # Fetch recent posts to find matches
-                    response = self.blogger.service.posts().list(
-                        blogId=self.blogger.blog_id,
-                        maxResults=50
-                    ).execute()
-                    items = response.get('items', [])
+            else:
+                print(f"  [Warning] No image found for this article")
+            
+            # Convert text paragraphs into semantic <p> tags for better SEO crawling
+            formatted_paragraphs = []
+            lines = [p.strip() for p in description.split("\n") if p.strip()]
+            
+            if lines:
+                first_line_clean = lines[0].replace('**', '').replace('تیتر:', '').replace('عنوان:', '').strip()
+                article_title_clean = article_title.strip()
+                if article_title_clean in first_line_clean or first_line_clean in article_title_clean:
+                    lines = lines[1:]
                     
-                    current_lbls = set(post_labels) if post_labels else {"حقوق بشر"}
-                    candidates = []
-                    for it in items:
-                        lbls = it.get('labels', [])
-                        it_lbl_set = set(lbls) if lbls else {"حقوق بشر"}
-                        overlap = len(current_lbls.intersection(it_lbl_set))
-                        candidates.append((overlap, it))
-                        
-                    # Sort by overlap, then publish date
-                    candidates.sort(key=lambda x: (x[0], x[1].get('published', '')), reverse=True)
+            for p in lines:
+                if p != "محتوا:" and not p.startswith("عنوان:") and not p.startswith("تیتر:"):
+                    formatted_paragraphs.append(f'<p style="margin-bottom:18px;">{p}</p>')
                     
-                    selected_posts = []
-                    for score, it in candidates:
-                        it_lbls = it.get('labels', [])
-                        it_lbl = it_lbls[0] if it_lbls else "حقوق بشر"
-                        
-                        it_img = extract_first_image(it.get('content', ''), it_lbl, self.resolved_images)
-                        it_date = get_persian_date(it.get('published', ''))
-                        
-                        selected_posts.append({
-                            'title': it['title'],
-                            'url': it.get('url', ''),
-                            'label': it_lbl,
-                            'image': it_img,
-                            'date': it_date
-                        })
-                        if len(selected_posts) == 3:
-                            break
-                            
-                    # Fill up to 3 if needed
-                    while len(selected_posts) < 3 and items:
-                        for it in items:
-                            if it.get('url') in [p['url'] for p in selected_posts]:
-                                continue
-                            it_lbls = it.get('labels', [])
-                            it_lbl = it_lbls[0] if it_lbls else "حقوق بشر"
-                            it_img = extract_first_image(it.get('content', ''), it_lbl, self.resolved_images)
-                            it_date = get_persian_date(it.get('published', ''))
-                            selected_posts.append({
-                                'title': it['title'],
-                                'url': it.get('url', ''),
-                                'label': it_lbl,
-                                'image': it_img,
-                                'date': it_date
-                            })
-                            if len(selected_posts) == 3:
-                                break
-                        break
-                        
-                    if len(selected_posts) >= 3:
-                        current_post_label = post_labels[0] if post_labels else "حقوق بشر"
-                        related_widget_html = build_related_posts_widget(selected_posts, current_post_label)
-                except Exception as e:
-                    print(f"  [ERROR] Building related posts widget: {e}")
-
-                html_content = f"""
-                <style>.post-featured-image, .post-thumbnail {{ display: none !important; }}</style>
-                {schema_script}
-                {image_html}
-                
-                <!-- Semantic Article Body -->
-                <article style="font-size:17px;line-height:2.2;color:#fff;text-align:justify;direction:rtl;font-family:'Vazir',sans-serif;">
+            description_html = "\n".join(formatted_paragraphs)
 
-                    
-                    <!-- Article Content -->
-                    <div>
-                        {description_html}
-                    </div>
-                </article>
-                <!-- SEO Internal Link Tag Cloud & Source Box -->
-                <footer style="margin-top:35px;border-top:1px solid #222;padding-top:20px;display:flex;justify-content:space-between;align-items:center;flex-wrap:wrap;direction:rtl;text-align:right;">
-                    <div style="font-size:14px;color:#888;margin-bottom:10px;">
-                        <span style="color:#aaa;margin-left:8px;font-weight:bold;">برچسب‌های مرتبط:</span>
-                        {tags_html}
-                    </div>
-                    <div style="background:#161616;padding:10px 20px;border-radius:8px;border-right:3px solid #c0392b;font-weight:bold;color:#ddd;font-size:13px;box-shadow:0 4px 10px rgba(0,0,0,0.4);margin-bottom:10px;">
-                        <span style="color:#c0392b;margin-left:8px;">منبع خبر:</span> {source_name}
-                    </div>
-                </footer>
+            # Generate Google Rich Snippet (Schema.org JSON-LD Structured Data)
+            import json
+            from urllib.parse import quote
+            
+            # Dynamic JSON-LD preparation
+            schema_data = {
+                "@context": "https://schema.org",
+                "@type": "NewsArticle",
+                "headline": article_title,
+                "image": [main_image] if main_image else [],
+                "datePublished": datetime.utcnow().isoformat() + "Z",
+                "dateModified": datetime.utcnow().isoformat() + "Z",
+                "author": {
+                    "@type": "Organization",
+                    "name": "iranpolnews",
+                    "url": "https://iranpolnews.blogspot.com"
+                },
+                "publisher": {
+                    "@type": "Organization",
+                    "name": "iranpolnews",
+                    "logo": {
+                        "@type": "ImageObject",
+                        "url": "https://cdn.jsdelivr.net/gh/AmirCode97/blogger-news-bot@main/images/HHk1ato9bgvQfZFgfsFF.png"
+                    }
+                },
+                "description": meta_description
+            }
+            
+            schema_json = json.dumps(schema_data, ensure_ascii=False)
+            schema_script = f'<script type="application/ld+json">{schema_json}</script>'
+
+            # Generate internal category SEO links
+            labels_to_use = post_labels if post_labels else ["حقوق بشر"]
+            tag_links = []
+            for label in labels_to_use:
+                tag_links.append(f'<a href="/search/label/{quote(label)}" style="color:#c0392b;text-decoration:none;margin-left:12px;font-weight:bold;transition:color 0.2s;" onmouseover="this.style.color=\'#e74c3c\'" onmouseout="this.style.color=\'#c0392b\'">#{label}</a>')
+            tags_html = " ".join(tag_links)
+
+            # Generate "مطالب مرتبط" (Related Posts) widget dynamically for new post
+            related_widget_html = ""
+            try:
+                from update_all_posts import build_related_posts_widget
                 
-                <!-- Related Posts Widget -->
-                {related_widget_html}
-                """
+                # Rank the run's cached recent-posts index (no per-article list call)
+                selected_posts = self.recent_posts.select_related(post_labels) if self.recent_posts else []
+                    
+                if len(selected_posts) >= 3:
+                    current_post_label = post_labels[0] if post_labels else "حقوق بشر"
+                    related_widget_html = build_related_posts_widget(selected_posts, current_post_label)
+            except Exception as e:
+                print(f"  [ERROR] Building related posts widget: {e}")
 
-                # 4. PUBLISH
-                if self.blogger:
-                    post_result = self.blogger.create_post(
+            html_content = f"""
+            <style>.post-featured-image, .post-thumbnail {{ display: none !important; }}</style>
+            {schema_script}
+            {image_html}
+            
+            <!-- Semantic Article Body -->
+            <article style="font-size:17px;line-height:2.2;color:#fff;text-align:justify;direction:rtl;font-family:'Vazir',sans-serif;">
+
+                
+                <!-- Article Content -->
+                <div>
+                    {description_html}
+                </div>
+            </article>
+            <!-- SEO Internal Link Tag Cloud & Source Box -->
+            <footer style="margin-top:35px;border-top:1px solid #222;padding-top:20px;display:flex;justify-content:space-between;align-items:center;flex-wrap:wrap;direction:rtl;text-align:right;">
+                <div style="font-size:14px;color:#888;margin-bottom:10px;">
+                    <span style="color:#aaa;margin-left:8px;font-weight:bold;">برچسب‌های مرتبط:</span>
+                    {tags_html}
+                </div>
+                <div style="background:#161616;padding:10px 20px;border-radius:8px;border-right:3px solid #c0392b;font-weight:bold;color:#ddd;font-size:13px;box-shadow:0 4px 10px rgba(0,0,0,0.4);margin-bottom:10px;">
+                    <span style="color:#c0392b;margin-left:8px;">منبع خبر:</span> {source_name}
+                </div>
+            </footer>
+            
+            <!-- Related Posts Widget -->
+            {related_widget_html}
+            """
+
+            # 4. PUBLISH
+            if self.blogger:
+                post_result = self.blogger.create_post(
+                    title=article_title,
+                    content=html_content,
+                    labels=post_labels,
+                    is_draft=False
+                )
+                if post_result:
+                    print(f"[OK] Published: {post_result.get('url')}")
+                    if self.recent_posts:
+                        self.recent_posts.add_published(post_result, post_labels, proxied_image if main_image else "")
+                    
+                    # Mark as published in BOTH systems
+                    self.fetcher.mark_as_seen(article_title, item['id'])
+                    self.duplicate_detector.mark_as_published(
                         title=article_title,
-                        content=html_content,
-                        labels=post_labels,
-                        is_draft=False
+                        url=article_link,
+                        content=description,
+                        post_id=post_result.get('id', '')
                     )
-                    if post_result:
-                        print(f"[OK] Published: {post_result.get('url')}")
-                        published_count += 1
-                        
-                        # Mark as published in BOTH systems
-                        self.fetcher.mark_as_seen(article_title, item['id'])
-                        self.duplicate_detector.mark_as_published(
-                            title=article_title,
-                            url=article_link,
-                            content=description,
-                            post_id=post_result.get('id', '')
-                        )
-                        
-                        # 4. ANTI-429 DELAY
-                        print("  [Wait] 20s delay to avoid Blogger rate limits...")
-                        time.sleep(20)
-                    else:
-                        print(f"[FAILED] Could not post to Blogger")
-                
-            except Exception as e:
-                print(f"[ERROR] Processing item: {e}")
-
-        print(f"\nFinished. Published {published_count} items.")
-        
-        # Finally, update the live statistics
-        try:
-            from stats_updater import fetch_and_calculate_stats, update_stats_post
-            print("\n[INFO] Running Live Stats Engine...")
-            stats_data = fetch_and_calculate_stats()
-            if stats_data and self.blogger:
-                update_stats_post(self.blogger, stats_data)
+                    return True
+                else:
+                    print(f"[FAILED] Could not post to Blogger")
+            return False
         except Exception as e:
-            print(f"[Error] Failed to update stats: {e}")
+            print(f"[ERROR] Processing item: {e}")
+            return False
 
     def run_once(self):
         self.fetch_and_process_news()
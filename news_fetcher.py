@@ -1,4 +1,3 @@
-import random
 import sys
 import feedparser
 import requests
@@ -8,8 +7,11 @@ import hashlib
 import json
 import os
 import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from typing import List, Dict, Optional
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlparse
 
 # Try to import cloudscraper for Cloudflare bypass
 try:
@@ -19,16 +21,25 @@ except ImportError:
     HAS_CLOUDSCRAPER = False
     print("[WARNING] cloudscraper not installed. Install with: pip install cloudscraper")
 
-# Try to import playwright for JS-rendered SPA sites (e.g. iranintl.com)
-try:
-    from playwright.sync_api import sync_playwright
-    HAS_PLAYWRIGHT = True
-except ImportError:
-    HAS_PLAYWRIGHT = False
-    print("[WARNING] playwright not installed. Install with: pip install playwright && playwright install chromium")
+# Shared headless browser for JS-rendered SPA sites (e.g. iranintl.com)
+from browser_pool import BrowserPool, HAS_PLAYWRIGHT
+from cache_storage import open_seen_store
+from http_cache import HttpCache
+from proxy_manager import ProxyManager
+from route_memory import RouteMemory
+from article_extractor import ArticleExtractorRegistry, HTML_PARSER, best_image_from_srcset as _best_image_from_srcset
 
 # Import config
-from config import NEWS_SOURCES, FILTER_KEYWORDS, USE_PROXY, PROXY_URL, FREE_PROXIES
+from config import (
+    NEWS_SOURCES, FILTER_KEYWORDS, USE_PROXY, PROXY_URL, FREE_PROXIES,
+    PROXY_TIMEOUT_SECONDS, PROXY_FAILURE_THRESHOLD, PROXY_COOLDOWN_SECONDS,
+    PROXY_PREFLIGHT, PROXY_PREFLIGHT_URL, PROXY_PREFLIGHT_TIMEOUT,
+    HEDGED_REQUESTS, HEDGE_DELAY_SECONDS, HEDGE_MAX_DELAY_SECONDS, FETCH_ROUTES_FILE,
+    FETCH_CONCURRENCY, FETCH_PER_HOST_LIMIT, FETCH_BUDGET_SECONDS,
+    PLAYWRIGHT_PAGE_CONCURRENCY, PLAYWRIGHT_BLOCK_RESOURCES, PLAYWRIGHT_SETTLE_TIMEOUT_MS,
+    ARTICLE_EXTRACTORS, DEFAULT_ARTICLE_EXTRACTOR,
+    HTTP_CACHE_ENABLED, HTTP_CACHE_FILE, HTTP_CACHE_MAX_KB
+)
 
 def scrub_secrets(text):
     if not isinstance(text, str):
@@ -44,30 +55,23 @@ def safe_print(text):
     except:
         print(text.encode('utf-8', errors='replace').decode('utf-8'))
 
-def _best_image_from_srcset(srcset_str: str) -> str:
-    """Parse srcset attribute and return the URL with highest resolution."""
-    if not srcset_str:
-        return ""
-    best_url = ""
-    best_width = 0
-    for part in srcset_str.split(','):
-        part = part.strip()
-        if not part:
-            continue
-        tokens = part.split()
-        if len(tokens) >= 2:
-            url = tokens[0]
-            try:
-                width = int(tokens[1].lower().replace('w', '').replace('x', ''))
-            except:
-                width = 0
-            if width > best_width:
-                best_width = width
-                best_url = url
-        elif len(tokens) == 1:
-            if not best_url:
-                best_url = tokens[0]
-    return best_url
+# Article extraction strategies per domain, tried in order.
+# 'playwright' renders the page in the shared browser, 'static' downloads + parses the HTML.
+ARTICLE_FETCH_STRATEGIES = {
+    'iranintl.com': ['playwright', 'static'] if HAS_PLAYWRIGHT else ['static'],
+}
+DEFAULT_FETCH_STRATEGIES = ['static']
+
+
+def _close(response):
+    """Release the connection of a response that is not handed to the caller."""
+    if response is not None:
+        response.close()
+
+
+def _close_response(future):
+    """Done-callback for a losing hedged attempt: release its connection."""
+    _close(future.result())
 
 
 def _is_ok_response(response) -> bool:
@@ -78,45 +82,32 @@ def _is_ok_response(response) -> bool:
 class NewsFetcher:
     def __init__(self):
         self.cache_file = "news_cache.json"
-        self.seen_ids = set()
-        self.seen_titles = set()
-        self._load_cache()
-        self.seen_news = self.seen_ids
+        self.seen_store = open_seen_store(self.cache_file)
         self.current_proxy = None
+        proxy_list = [PROXY_URL] if PROXY_URL else FREE_PROXIES
+        self.proxy_manager = ProxyManager(
+            proxy_list, PROXY_FAILURE_THRESHOLD, PROXY_COOLDOWN_SECONDS
+        ) if USE_PROXY and proxy_list else None
+        self._proxies_probed = False
+        self.route_memory = RouteMemory(FETCH_ROUTES_FILE, HEDGE_DELAY_SECONDS, HEDGE_MAX_DELAY_SECONDS)
+        self._hedge_pool = None
+        self._host_semaphores = {}
+        self._host_lock = threading.Lock()
+        self._browser_pool = None
+        self.extractors = ArticleExtractorRegistry(ARTICLE_EXTRACTORS, DEFAULT_ARTICLE_EXTRACTOR)
+        self.http_cache = HttpCache(HTTP_CACHE_FILE, HTTP_CACHE_MAX_KB * 1024) if HTTP_CACHE_ENABLED else None
         self._setup_session()
 
-    def _load_cache(self):
-        if os.path.exists(self.cache_file):
-            try:
-                with open(self.cache_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.seen_ids = set(data.get('seen_ids', []))
-                    self.seen_titles = set(data.get('seen_titles', []))
-            except: pass
-
-    def _save_cache(self):
-        data = {
-            'seen_ids': list(self.seen_ids),
-            'seen_titles': list(self.seen_titles)
-        }
-        try:
-            with open(self.cache_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False)
-        except Exception as e:
-            print(f"Error saving cache: {e}")
-
     def _generate_news_id(self, title: str, link: str) -> str:
         clean_title = re.sub(r'[^\w\s]', '', title).strip()
         unique_string = f"{clean_title}_{link}"
         return hashlib.md5(unique_string.encode()).hexdigest()
 
     def is_duplicate(self, title: str, news_id: str) -> bool:
-        return news_id in self.seen_ids or title in self.seen_titles
+        return self.seen_store.contains(news_id, title)
 
     def mark_as_seen(self, title: str, news_id: str):
-        self.seen_ids.add(news_id)
-        self.seen_titles.add(title)
-        self._save_cache()
+        self.seen_store.add(news_id, title)
 
     def _setup_session(self):
         self.session = requests.Session()
@@ -136,14 +127,34 @@ class NewsFetcher:
         else:
             self.cf_session = None
 
-    def _get_proxy(self) -> Optional[Dict]:
-        if not USE_PROXY: return None
-        if PROXY_URL: return {'http': PROXY_URL, 'https': PROXY_URL}
-        if FREE_PROXIES:
-            proxy = random.choice(FREE_PROXIES)
+    def _get_proxy(self, host: str) -> Optional[str]:
+        """Healthiest proxy for this host (None: no proxies, or all of them are tripped)."""
+        if not self.proxy_manager: return None
+        proxy = self.proxy_manager.choose(host)
+        if proxy:
             self.current_proxy = proxy
-            return {'http': proxy, 'https': proxy}
-        return None
+        return proxy
+
+    def _preflight_proxies(self):
+        if self._proxies_probed or not PROXY_PREFLIGHT or not self.proxy_manager:
+            return
+        self._proxies_probed = True
+        alive = self.proxy_manager.probe(PROXY_PREFLIGHT_URL, timeout=PROXY_PREFLIGHT_TIMEOUT)
+        safe_print(f"[Proxy] Pre-flight: {alive}/{len(self.proxy_manager.proxies)} proxies answered")
+
+    def _get_via_proxy(self, url: str, proxy: str, timeout: int, headers: Optional[Dict]) -> Optional[requests.Response]:
+        """GET through one proxy and report the outcome to the health tracker."""
+        host = urlparse(url).netloc.lower()
+        started = time.monotonic()
+        try:
+            response = self.session.get(url, proxies={'http': proxy, 'https': proxy},
+                                        timeout=min(timeout, PROXY_TIMEOUT_SECONDS), verify=False, headers=headers)
+        except Exception:
+            self.proxy_manager.report(proxy, host, False, time.monotonic() - started, connection_error=True)
+            return None
+        ok = not ProxyManager.is_failure_status(response.status_code)
+        self.proxy_manager.report(proxy, host, ok, time.monotonic() - started)
+        return response
 
     def _is_cloudflare_site(self, url: str) -> bool:
         cf_domains = [
@@ -153,38 +164,129 @@ class NewsFetcher:
         ]
         return any(domain in url for domain in cf_domains)
 
-    def _make_request(self, url: str, use_proxy: bool = False, timeout: int = 30) -> Optional[requests.Response]:
-        proxies = self._get_proxy() if use_proxy else None
-
+    def _request_routes(self, url: str, use_proxy: bool) -> List[str]:
+        """Ways to reach url, in default order; the host's remembered winner is moved first."""
+        routes = []
         if self._is_cloudflare_site(url) and self.cf_session:
-            try:
-                safe_print(f"  [CF] Using cloudscraper for {url[:60]}...")
-                response = self.cf_session.get(url, timeout=timeout)
-                if response.status_code == 200:
-                    return response
-                else:
-                    safe_print(f"  [CF] Status {response.status_code}, falling back...")
-            except Exception as e:
-                safe_print(f"  [CF] Error: {e}, falling back...")
-
-        if proxies:
-            try:
-                response = self.session.get(url, proxies=proxies, timeout=timeout, verify=False)
-                if response.status_code == 200:
-                    return response
-            except: pass
+            routes.append('cloudscraper')
+        if use_proxy and self.proxy_manager:
+            routes.append('proxy')
+        routes.append('direct')
+        return self.route_memory.order(urlparse(url).netloc.lower(), routes)
 
+    def _attempt(self, route: str, url: str, timeout: int, headers: Optional[Dict]) -> Optional[requests.Response]:
         try:
-            response = self.session.get(url, timeout=timeout, verify=False)
-            if response.status_code == 200:
-                return response
-            else:
-                # Return response with status code so callers can log it,
-                # but callers MUST use _is_ok_response() to check success.
+            if route == 'cloudscraper':
+                safe_print(f"  [CF] Using cloudscraper for {url[:60]}...")
+                return self.cf_session.get(url, timeout=timeout, headers=headers)
+            if route == 'proxy':
+                proxy = self._get_proxy(urlparse(url).netloc.lower())
+                return self._get_via_proxy(url, proxy, timeout, headers) if proxy else None
+            return self.session.get(url, timeout=timeout, verify=False, headers=headers)
+        except Exception as e:
+            safe_print(f"  [{route}] Error: {e}")
+            return None
+
+    def _make_request(self, url: str, use_proxy: bool = False, timeout: int = 30,
+                      headers: Optional[Dict] = None) -> Optional[requests.Response]:
+        """
+        GET url via cloudscraper / proxy / direct. Returns the first OK response; otherwise the
+        last response received (callers MUST use _is_ok_response() to check success) or None.
+        """
+        routes = self._request_routes(url, use_proxy)
+        # 304 only comes back when conditional headers were sent; it is as good as a 200
+        ok_status = (200, 304) if headers else (200,)
+        if HEDGED_REQUESTS and len(routes) > 1:
+            return self._make_request_hedged(url, routes, timeout, headers, ok_status)
+
+        host = urlparse(url).netloc.lower()
+        last_response = None
+        for route in routes:
+            started = time.monotonic()
+            response = self._attempt(route, url, timeout, headers)
+            if response is None:
+                continue
+            if response.status_code in ok_status:
+                self.route_memory.record_win(host, route, time.monotonic() - started)
+                _close(last_response)
                 return response
-        except: pass
+            safe_print(f"  [{route}] Status {response.status_code}, falling back...")
+            _close(last_response)
+            last_response = response
+        return last_response
 
-        return None
+    def _make_request_hedged(self, url: str, routes: List[str], timeout: int, headers: Optional[Dict],
+                             ok_status: tuple) -> Optional[requests.Response]:
+        """
+        Start the first route; whenever the host's hedge delay passes without an OK answer
+        (or every running route has failed), also start the next one. The first OK response
+        wins; queued attempts are cancelled and late answers are closed.
+
+        The first running attempt uses the caller's request to the host; every attempt
+        started next to it takes a per-host slot (FETCH_PER_HOST_LIMIT), and without a
+        free slot the next route waits until a running one fails.
+        """
+        host = urlparse(url).netloc.lower()
+        delay = self.route_memory.hedge_delay(host)
+        semaphore = self._host_semaphore(url)
+        pool = self._get_hedge_pool()
+        pending = {}
+        last_response = None
+        remaining = list(routes)
+
+        while remaining or pending:
+            if remaining and (not pending or semaphore.acquire(blocking=False)):
+                route = remaining.pop(0)
+                future = pool.submit(self._attempt, route, url, timeout, headers)
+                if pending:
+                    future.add_done_callback(lambda _: semaphore.release())
+                pending[future] = (route, time.monotonic())
+            done, _ = wait(pending, timeout=delay if remaining else None, return_when=FIRST_COMPLETED)
+            for future in done:
+                route, started = pending.pop(future)
+                response = future.result()
+                if response is None:
+                    continue
+                if response.status_code in ok_status:
+                    self.route_memory.record_win(host, route, time.monotonic() - started)
+                    if len(routes) > 1 and route != routes[0]:
+                        safe_print(f"  [Hedge] '{route}' answered first for {host}")
+                    _close(last_response)
+                    for loser in pending:
+                        if not loser.cancel():
+                            loser.add_done_callback(_close_response)
+                    return response
+                _close(last_response)
+                last_response = response
+        return last_response
+
+    def _get_hedge_pool(self) -> ThreadPoolExecutor:
+        with self._host_lock:
+            if self._hedge_pool is None:
+                # Losing attempts run on until their own timeout, so leave room for them
+                self._hedge_pool = ThreadPoolExecutor(max_workers=max(4, FETCH_CONCURRENCY * 4),
+                                                      thread_name_prefix='hedge')
+            return self._hedge_pool
+
+    def _fetch_listing(self, url: str):
+        """
+        GET a category page or feed with conditional headers.
+        Returns (response, None), or (None, cached_items) when the server answered 304.
+        """
+        entry = self.http_cache.get(url) if self.http_cache else None
+        response = self._make_request(url, use_proxy=True, headers=HttpCache.conditional_headers(entry))
+        if response is not None and response.status_code == 304:
+            if entry is not None:
+                items = [item for item in entry['items'] if not self.is_duplicate(item['title'], item['id'])]
+                safe_print(f"  [HTTP-Cache] Not modified, reusing {len(items)} unseen of {len(entry['items'])} cached items")
+                return None, items
+            response = self._make_request(url, use_proxy=True)
+        return response, None
+
+    def _remember_listing(self, url: str, response, news_items: List[Dict]) -> List[Dict]:
+        if self.http_cache and _is_ok_response(response):
+            self.http_cache.store(url, response, news_items)
+        return news_items
 
     def fetch_from_rss(self, source: dict) -> List[Dict]:
         news_items = []
@@ -192,7 +294,9 @@ class NewsFetcher:
         try:
             safe_print(f"[RSS] Fetching from {source['name']}...")
 
-            response = self._make_request(url, use_proxy=True)
+            response, cached_items = self._fetch_listing(url)
+            if cached_items is not None:
+                return cached_items
             if not _is_ok_response(response):
                 safe_print(f"  [Error] Could not fetch RSS XML (status: {response.status_code if response else 'None'})")
                 return []
@@ -243,6 +347,7 @@ class NewsFetcher:
                     'published': entry.get('published', datetime.now().isoformat()),
                     'image_url': image_url
                 })
+            self._remember_listing(url, response, news_items)
         except Exception as e:
             safe_print(f"  [Error] RSS: {e}")
         return news_items
@@ -252,7 +357,9 @@ class NewsFetcher:
         Dedicated fetcher for hra-news.org category pages.
         """
         safe_print(f"[Scrape/HRA] Fetching from {source['name']}...")
-        response = self._make_request(source['url'], use_proxy=True)
+        response, cached_items = self._fetch_listing(source['url'])
+        if cached_items is not None:
+            return cached_items
         if not _is_ok_response(response):
             safe_print(f"  [HRA] Could not fetch page (status: {response.status_code if response else 'None'}), trying RSS fallback...")
             rss_fallback = source.get('rss_fallback')
@@ -308,7 +415,7 @@ class NewsFetcher:
                     })
                 if news_items:
                     safe_print(f"  [HRA] h2 strategy found {len(news_items)} articles")
-                    return news_items
+                    return self._remember_listing(source['url'], response, news_items)
 
         # Strategy 3: RSS fallback if still too few
         if len(articles) < 3 and not news_items:
@@ -355,7 +462,7 @@ class NewsFetcher:
                 'image_url': image_url
             })
 
-        return news_items
+        return self._remember_listing(source['url'], response, news_items)
 
     def fetch_from_scrape(self, source: dict) -> List[Dict]:
         news_items = []
@@ -366,7 +473,9 @@ class NewsFetcher:
 
         try:
             safe_print(f"[Scrape] Fetching from {source['name']}...")
-            response = self._make_request(source['url'], use_proxy=True)
+            response, cached_items = self._fetch_listing(source['url'])
+            if cached_items is not None:
+                return cached_items
 
             # ---- FIX: trigger RSS fallback on ANY non-200 response (incl. 403) ----
             if not _is_ok_response(response):
@@ -434,256 +543,159 @@ class NewsFetcher:
                     'published': datetime.now().isoformat(),
                     'image_url': image_url
                 })
+            self._remember_listing(source['url'], response, news_items)
         except Exception as e:
             safe_print(f"  [Error] Scrape: {e}")
         return news_items
 
+    def _fetch_source(self, source: dict) -> List[Dict]:
+        source_type = source.get('type', 'rss')
+        if source_type == 'rss':
+            return self.fetch_from_rss(source)
+        elif source_type == 'scrape':
+            return self.fetch_from_scrape(source)
+        return []
+
+    def _host_semaphore(self, url: str) -> threading.BoundedSemaphore:
+        host = urlparse(url).netloc.lower()
+        if host.startswith('www.'):
+            host = host[4:]
+        with self._host_lock:
+            if host not in self._host_semaphores:
+                self._host_semaphores[host] = threading.BoundedSemaphore(max(1, FETCH_PER_HOST_LIMIT))
+            return self._host_semaphores[host]
+
+    def _fetch_source_limited(self, source: dict, deadline: float) -> List[Dict]:
+        """Fetch one source while holding its per-host slot (gives up at the deadline)."""
+        semaphore = self._host_semaphore(source.get('url', ''))
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not semaphore.acquire(timeout=remaining):
+            safe_print(f"  [Budget] Host busy until fetch deadline, skipping {source['name']}")
+            return []
+        try:
+            return self._fetch_source(source)
+        finally:
+            semaphore.release()
+
+    def _fetch_sources_concurrently(self, sources: List[dict]) -> List[List[Dict]]:
+        """
+        Fetch all sources in a thread pool under a global wall-clock budget.
+        Returns one result list per source, in the same order as `sources`.
+        """
+        deadline = time.monotonic() + FETCH_BUDGET_SECONDS
+        pool = ThreadPoolExecutor(max_workers=min(FETCH_CONCURRENCY, len(sources)), thread_name_prefix='fetch')
+        futures = [pool.submit(self._fetch_source_limited, source, deadline) for source in sources]
+        done, _ = wait(futures, timeout=FETCH_BUDGET_SECONDS)
+        # Don't let a stalled site hold up the cycle; its late result is simply dropped
+        pool.shutdown(wait=False, cancel_futures=True)
+
+        results = []
+        for source, future in zip(sources, futures):
+            if future not in done:
+                safe_print(f"  [Budget] {source['name']} exceeded {FETCH_BUDGET_SECONDS}s fetch budget, skipping this cycle")
+                results.append([])
+                continue
+            try:
+                results.append(future.result())
+            except Exception as e:
+                safe_print(f"  [Error] {source['name']}: {e}")
+                results.append([])
+        return results
+
     def fetch_all_news(self, max_items: int = 20) -> List[Dict]:
+        sources = [source for source in NEWS_SOURCES if source.get('enabled', True)]
+        if not sources:
+            return []
+        # Stable sort: sources with equal priority keep their config order
+        sources.sort(key=lambda source: source.get('priority', 1))
+
+        self._preflight_proxies()
+        if FETCH_CONCURRENCY > 1 and len(sources) > 1:
+            results = self._fetch_sources_concurrently(sources)
+        else:
+            results = [self._fetch_source(source) for source in sources]
+
+        if self.http_cache:
+            self.http_cache.save()
+        self.route_memory.save()
+
         all_news = []
-        for source in NEWS_SOURCES:
-            if not source.get('enabled', True):
-                continue
-            source_type = source.get('type', 'rss')
-            if source_type == 'rss':
-                all_news.extend(self.fetch_from_rss(source))
-            elif source_type == 'scrape':
-                all_news.extend(self.fetch_from_scrape(source))
+        for items in results:
+            all_news.extend(items)
         return all_news[:max_items]
 
+    def _article_strategies(self, url: str) -> List[str]:
+        host = urlparse(url).netloc.lower()
+        for domain, strategies in ARTICLE_FETCH_STRATEGIES.items():
+            if host == domain or host.endswith('.' + domain):
+                return strategies
+        return DEFAULT_FETCH_STRATEGIES
+
     def fetch_full_article(self, url: str, source_name: str) -> Dict:
         safe_print(f"  [Fetch] {url[:60]}...")
 
+        # One strategy per domain up front; the next one only runs if it fails
+        result = {'success': False, 'full_content': '', 'main_image': None}
+        for strategy in self._article_strategies(url):
+            if strategy == 'playwright':
+                result = self._extract_with_playwright(url)
+            else:
+                result = self._extract_static(url)
+            if result['success']:
+                break
+            safe_print(f"  [Fetch] '{strategy}' extraction failed for this article")
+        return result
+
+    def _build_article_result(self, paragraphs: List[str], main_image: Optional[str]) -> Dict:
+        full_text = "\n\n".join(paragraphs[:15]) if paragraphs else ""
+
+        if full_text:
+            safe_print(f"  [OK] Extracted {len(paragraphs)} paragraphs, {len(full_text)} chars")
+        else:
+            safe_print(f"  [Warning] No content extracted")
+
+        if main_image:
+            safe_print(f"  [Image] {main_image[:100]}")
+        else:
+            safe_print(f"  [Warning] No image found")
+
+        return {
+            'success': len(full_text) > 50,
+            'full_content': full_text,
+            'main_image': main_image
+        }
+
+    def _extract_with_playwright(self, url: str) -> Dict:
+        """Render SPA pages (e.g. iranintl.com) in the shared browser, without a prior static download."""
+        paragraphs = []
+        main_image = None
+
+        pw_result = self._fetch_with_playwright(url)
+        if pw_result:
+            if pw_result.get('image'):
+                main_image = pw_result['image']
+            if pw_result.get('content'):
+                cleaned = self._clean_iranintl_content(pw_result['content'])
+                if cleaned:
+                    paragraphs = [cleaned]
+
+        return self._build_article_result(paragraphs, main_image)
+
+    def _extract_static(self, url: str) -> Dict:
         response = self._make_request(url, use_proxy=True)
         if not _is_ok_response(response):
             safe_print(f"  [Warning] Could not fetch article page")
             return {'success': False, 'full_content': '', 'main_image': None}
 
         try:
-            soup = BeautifulSoup(response.content, 'html.parser')
-            paragraphs = []
-            main_image = None
-
-            # ==== Iran International (SPA - needs Playwright) ====
-            if 'iranintl.com' in url:
-                if HAS_PLAYWRIGHT:
-                    pw_result = self._fetch_with_playwright(url)
-                    if pw_result:
-                        if pw_result.get('image'):
-                            main_image = pw_result['image']
-                        if pw_result.get('content'):
-                            cleaned = self._clean_iranintl_content(pw_result['content'])
-                            if cleaned:
-                                paragraphs = [cleaned]
-
-                if not main_image:
-                    og_img = soup.find('meta', property='og:image')
-                    if og_img:
-                        main_image = og_img.get('content')
-
-                if not paragraphs:
-                    meta_desc = soup.find('meta', {'name': 'description'})
-                    if meta_desc:
-                        paragraphs.append(meta_desc.get('content', ''))
-
-                    for script in soup.find_all('script', type='application/ld+json'):
-                        try:
-                            data = json.loads(script.string)
-                            if isinstance(data, dict):
-                                if 'articleBody' in data:
-                                    paragraphs = [data['articleBody']]
-                                    break
-                                elif 'description' in data:
-                                    paragraphs.append(data['description'])
-                        except: pass
-
-            # ==== IranHR.net ====
-            elif 'iranhr.net' in url:
-                content_div = soup.find('div', class_='context') or soup.find('article') or soup.find('div', class_='col-md-8')
-                if content_div:
-                    for p in content_div.find_all(['p', 'h2', 'h3']):
-                        text = p.get_text().strip()
-                        if len(text) > 50 and 'cookie' not in text.lower():
-                            if text not in paragraphs:
-                                paragraphs.append(text)
-
-                main_img_div = soup.find('div', class_='main-image') or soup.find('img', class_='main-image')
-                if main_img_div:
-                    img_tag = main_img_div.find('img') if main_img_div.name == 'div' else main_img_div
-                    if img_tag:
-                        src = _best_image_from_srcset(img_tag.get('srcset', '')) or img_tag.get('src') or img_tag.get('data-src')
-                        if src:
-                            main_image = urljoin(url, src)
-                            if main_image.startswith('http://'):
-                                main_image = main_image.replace('http://', 'https://', 1)
-
-                if not main_image:
-                    og_img = soup.find('meta', property='og:image')
-                    if og_img:
-                        main_image = og_img.get('content', '')
-                        if main_image.startswith('http://'):
-                            main_image = main_image.replace('http://', 'https://', 1)
-
-                if main_image:
-                    safe_print(f"  [IranHR] Image found: {main_image[:80]}")
-
-            # ==== HRA News / Harana (hra-news.org) ====
-            elif 'hra-news.org' in url:
-                content_div = soup.find('div', class_='entry-content') or soup.find('div', class_='post-content')
-                if content_div:
-                    for p in content_div.find_all(['p', 'h2', 'h3']):
-                        text = p.get_text().strip()
-                        if len(text) > 50 and 'cookie' not in text.lower() and 'اشتراک' not in text:
-                            if text not in paragraphs:
-                                paragraphs.append(text)
-
-                og_img = soup.find('meta', property='og:image')
-                if og_img:
-                    og_url = og_img.get('content', '')
-                    if og_url and 'logo' not in og_url.lower() and 'icon' not in og_url.lower():
-                        main_image = og_url
-                        safe_print(f"  [HRA-News] og:image: {main_image[:80]}")
-
-                if not main_image and content_div:
-                    for img in content_div.find_all('img'):
-                        src = _best_image_from_srcset(img.get('srcset', '')) or img.get('src') or img.get('data-src')
-                        if not src:
-                            continue
-                        if any(skip in src.lower() for skip in ['logo', 'icon', 'avatar', 'unknown_person', 'gravatar']):
-                            continue
-                        main_image = urljoin(url, src)
-                        safe_print(f"  [HRA-News] content image: {main_image[:80]}")
-                        break
-
-            # ==== Iran HRS ====
-            elif 'iranhrs.org' in url or 'iran-hrm.com' in url:
-                content_div = soup.find('div', class_='entry-content') or soup.find('article')
-                if content_div:
-                    for p in content_div.find_all(['p', 'h2', 'h3']):
-                        text = p.get_text().strip()
-                        if len(text) > 50 and 'cookie' not in text.lower():
-                            if text not in paragraphs:
-                                paragraphs.append(text)
-
-                og_img = soup.find('meta', property='og:image')
-                if og_img:
-                    main_image = og_img.get('content')
-                elif content_div:
-                    img = content_div.find('img')
-                    if img:
-                        main_image = urljoin(url, img.get('src', ''))
-
-            # ==== HumanRightsInIR.org ====
-            elif 'humanrightsinir.org' in url:
-                og_img = soup.find('meta', property='og:image')
-                if og_img:
-                    og_url = og_img.get('content', '')
-                    if og_url and 'cropped-' not in og_url and 'logo' not in og_url.lower():
-                        main_image = og_url
-                        safe_print(f"  [HumanRightsInIR] og:image: {main_image[:100]}")
-
-                if not main_image:
-                    wp_img = soup.find('img', class_='wp-post-image')
-                    if not wp_img:
-                        thumb_div = soup.find('div', class_=re.compile(r'thumb|featured|post-image'))
-                        if thumb_div:
-                            wp_img = thumb_div.find('img')
-                    if wp_img:
-                        src = (wp_img.get('data-src') or
-                               wp_img.get('data-lazy-src') or
-                               wp_img.get('src') or
-                               _best_image_from_srcset(wp_img.get('srcset', '')))
-                        if src:
-                            main_image = urljoin(url, src)
-                            safe_print(f"  [HumanRightsInIR] wp-post-image: {main_image[:100]}")
-
-                content_div = (
-                    soup.find('div', class_='entry-content') or
-                    soup.find('div', class_='post-content') or
-                    soup.find('div', class_=re.compile(r'entry|content|article-body|post-body')) or
-                    soup.find('article') or
-                    soup.find('div', class_='single-post-content')
-                )
-
-                if content_div:
-                    for p in content_div.find_all(['p', 'h2', 'h3', 'h4']):
-                        text = p.get_text().strip()
-                        if len(text) > 40 and 'cookie' not in text.lower():
-                            paragraphs.append(text)
-                    safe_print(f"  [HumanRightsInIR] content_div found: {len(paragraphs)} paragraphs")
-                else:
-                    safe_print(f"  [HumanRightsInIR] No content_div found, trying body-level p tags...")
-                    skip_parents = {'nav', 'footer', 'header', 'aside', 'form'}
-                    for p in soup.find_all('p'):
-                        parent_names = {par.name for par in p.parents if par.name}
-                        if parent_names & skip_parents:
-                            continue
-                        text = p.get_text().strip()
-                        if len(text) > 60:
-                            paragraphs.append(text)
-                    safe_print(f"  [HumanRightsInIR] body fallback: {len(paragraphs)} paragraphs")
-
-                if not paragraphs:
-                    meta_desc = soup.find('meta', {'name': 'description'}) or soup.find('meta', property='og:description')
-                    if meta_desc:
-                        desc_text = meta_desc.get('content', '').strip()
-                        if len(desc_text) > 40:
-                            paragraphs.append(desc_text)
-                            safe_print(f"  [HumanRightsInIR] using meta description as content")
-
-            # ==== Generic Extraction ====
-            else:
-                content_selectors = [
-                    ('article', {}),
-                    ('div', {'class': 'entry-content'}),
-                    ('div', {'class': 'post-content'}),
-                    ('div', {'class': 'content'}),
-                    ('main', {}),
-                ]
-
-                main_div = None
-                for tag, attrs in content_selectors:
-                    main_div = soup.find(tag, attrs) if attrs else soup.find(tag)
-                    if main_div:
-                        break
-
-                if not main_div:
-                    main_div = soup.body
-
-                if main_div:
-                    for p in main_div.find_all(['p']):
-                        text = p.get_text().strip()
-                        if len(text) > 50:
-                            paragraphs.append(text)
-
-                og_img = soup.find('meta', property='og:image')
-                if og_img:
-                    main_image = og_img.get('content')
-                else:
-                    twitter_img = soup.find('meta', {'name': 'twitter:image'})
-                    if twitter_img:
-                        main_image = twitter_img.get('content')
+            soup = BeautifulSoup(response.content, HTML_PARSER)
+            paragraphs, main_image = self.extractors.for_url(url).extract(soup, url)
 
             # Universal fallback image
             if not main_image:
                 main_image = self._extract_fallback_image(soup, url)
 
-            full_text = "\n\n".join(paragraphs[:15]) if paragraphs else ""
-
-            if full_text:
-                safe_print(f"  [OK] Extracted {len(paragraphs)} paragraphs, {len(full_text)} chars")
-            else:
-                safe_print(f"  [Warning] No content extracted")
-
-            if main_image:
-                safe_print(f"  [Image] {main_image[:100]}")
-            else:
-                safe_print(f"  [Warning] No image found")
-
-            return {
-                'success': len(full_text) > 50,
-                'full_content': full_text,
-                'main_image': main_image
-            }
+            return self._build_article_result(paragraphs, main_image)
 
         except Exception as e:
             safe_print(f"  [Error] Parse: {e}")
@@ -765,73 +777,37 @@ class NewsFetcher:
         cleaned = cleaned.strip()
         return cleaned
 
+    def _get_browser_pool(self) -> BrowserPool:
+        if self._browser_pool is None:
+            self._browser_pool = BrowserPool(
+                page_concurrency=PLAYWRIGHT_PAGE_CONCURRENCY,
+                block_resources=PLAYWRIGHT_BLOCK_RESOURCES,
+                settle_timeout=PLAYWRIGHT_SETTLE_TIMEOUT_MS,
+            )
+        return self._browser_pool
+
+    def close(self):
+        """Release long-lived resources (the shared Playwright browser) and flush buffered cache marks at the end of a run."""
+        self.seen_store.flush()
+        self.route_memory.save()
+        if self._hedge_pool is not None:
+            self._hedge_pool.shutdown(wait=False, cancel_futures=True)
+            self._hedge_pool = None
+        if self._browser_pool is not None:
+            self._browser_pool.close()
+
     def _fetch_with_playwright(self, url: str, timeout: int = 15000) -> Optional[Dict]:
         if not HAS_PLAYWRIGHT:
             return None
 
-        result = {'content': '', 'image': None}
-
         try:
-            with sync_playwright() as p:
-                browser = p.chromium.launch(headless=True, args=['--no-sandbox', '--disable-setuid-sandbox'])
-                context = browser.new_context(
-                    user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36',
-                    locale='fa-IR'
-                )
-                page = context.new_page()
-
-                safe_print(f"  [PW] Loading {url[:60]}...")
-                page.goto(url, wait_until='domcontentloaded', timeout=timeout)
+            safe_print(f"  [PW] Loading {url[:60]}...")
+            result = self._get_browser_pool().extract(url, timeout=timeout)
 
-                try:
-                    page.wait_for_selector('article, .article-body, [class*="article"], [class*="content"]', timeout=8000)
-                except:
-                    pass
-
-                page.wait_for_timeout(2000)
-
-                content = page.evaluate("""() => {
-                    const selectors = [
-                        '[class*="ArticleBody"]',
-                        '[class*="article-body"]',
-                        '[class*="story-body"]',
-                        'article',
-                        '[class*="content"]',
-                    ];
-                    for (const sel of selectors) {
-                        const el = document.querySelector(sel);
-                        if (el && el.innerText && el.innerText.length > 200) {
-                            return el.innerText.trim();
-                        }
-                    }
-                    return document.body ? document.body.innerText.trim() : '';
-                }""")
-
-                image = page.evaluate("""() => {
-                    const ogImg = document.querySelector('meta[property="og:image"]');
-                    if (ogImg) return ogImg.getAttribute('content');
-                    const selectors = [
-                        '[class*="featured"] img',
-                        '[class*="hero"] img',
-                        'article img',
-                    ];
-                    for (const sel of selectors) {
-                        const img = document.querySelector(sel);
-                        if (img && img.src && img.src.startsWith('http')) {
-                            return img.src;
-                        }
-                    }
-                    return null;
-                }""")
-
-                result['content'] = content or ''
-                result['image'] = image
-                browser.close()
-
-                if result['content']:
-                    safe_print(f"  [PW] Success: {len(result['content'])} chars")
-                else:
-                    safe_print(f"  [PW] No content extracted")
+            if result['content']:
+                safe_print(f"  [PW] Success: {len(result['content'])} chars")
+            else:
+                safe_print(f"  [PW] No content extracted")
 
         except Exception as e:
             safe_print(f"  [PW] Error: {e}")
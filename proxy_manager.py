@@ -0,0 +1,131 @@
+"""
+Proxy Health Tracking and Per-Host Routing
+پایش سلامت پروکسی‌ها و انتخاب بهترین پروکسی برای هر میزبان
+
+ProxyManager replaces random.choice(FREE_PROXIES). It records success and
+latency for every (proxy, host) pair and routes each host through the proxy
+that has worked best for it so far. Proxies with no history are tried
+before known-bad ones. A circuit breaker takes a proxy out of rotation for a
+host after repeated failures, and out of rotation everywhere after repeated
+connection errors, until its cooldown passes. An optional pre-flight probe
+tests every proxy concurrently before the first fetch.
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+import requests
+
+# Statuses that mean "this proxy is blocked / broken for this host", not "the page is missing"
+PROXY_FAILURE_STATUS = {403, 407, 429}
+DEFAULT_LATENCY = 2.0  # seconds assumed for a proxy we have not timed yet
+LATENCY_WEIGHT = 0.3   # EWMA weight of the newest sample
+
+
+class ProxyStats:
+    __slots__ = ('successes', 'failures', 'consecutive_failures', 'latency', 'open_until')
+
+    def __init__(self):
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.latency: Optional[float] = None
+        self.open_until = 0.0
+
+    def record(self, ok: bool, latency: float, threshold: int, cooldown: float):
+        if ok:
+            self.successes += 1
+            self.consecutive_failures = 0
+            self.open_until = 0.0
+            self.latency = latency if self.latency is None else (
+                LATENCY_WEIGHT * latency + (1 - LATENCY_WEIGHT) * self.latency)
+        else:
+            self.failures += 1
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= threshold:
+                self.open_until = time.monotonic() + cooldown
+
+    def is_open(self, now: float) -> bool:
+        return now < self.open_until
+
+    def score(self) -> float:
+        # Laplace-smoothed success rate per second of expected latency
+        rate = (self.successes + 1) / (self.successes + self.failures + 2)
+        latency = self.latency if self.latency is not None else DEFAULT_LATENCY
+        return rate / (1.0 + latency)
+
+
+class ProxyManager:
+    """Thread-safe proxy chooser; call choose() before and report() after every proxied request."""
+
+    def __init__(self, proxies: List[str], failure_threshold: int = 3, cooldown_seconds: float = 600):
+        self.proxies = list(dict.fromkeys(proxies))
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown_seconds = cooldown_seconds
+        self._global: Dict[str, ProxyStats] = {proxy: ProxyStats() for proxy in self.proxies}
+        self._by_host: Dict[tuple, ProxyStats] = {}
+        self._lock = threading.Lock()
+
+    def _host_stats(self, proxy: str, host: str) -> ProxyStats:
+        key = (proxy, host)
+        if key not in self._by_host:
+            self._by_host[key] = ProxyStats()
+        return self._by_host[key]
+
+    def choose(self, host: str) -> Optional[str]:
+        """Best proxy for host, or None when every proxy's breaker is open."""
+        now = time.monotonic()
+        with self._lock:
+            best, best_score = [], -1.0
+            for proxy in self.proxies:
+                if self._global[proxy].is_open(now):
+                    continue
+                stats = self._by_host.get((proxy, host))
+                if stats is not None and stats.is_open(now):
+                    continue
+                # No history for this host yet: judge the proxy by how it did elsewhere
+                score = (stats if stats is not None and stats.successes + stats.failures
+                         else self._global[proxy]).score()
+                if score > best_score:
+                    best, best_score = [proxy], score
+                elif score == best_score:
+                    best.append(proxy)
+            return random.choice(best) if best else None
+
+    def report(self, proxy: str, host: str, ok: bool, latency: float, connection_error: bool = False):
+        """
+        Record one request. A blocked status only counts against the proxy for this host;
+        connection errors and timeouts also count against the proxy as a whole.
+        """
+        with self._lock:
+            if proxy not in self._global:
+                return
+            self._host_stats(proxy, host).record(ok, latency, self.failure_threshold, self.cooldown_seconds)
+            if ok or connection_error:
+                self._global[proxy].record(ok, latency, self.failure_threshold, self.cooldown_seconds)
+
+    @staticmethod
+    def is_failure_status(status_code: int) -> bool:
+        return status_code in PROXY_FAILURE_STATUS or status_code >= 500
+
+    def probe(self, url: str, timeout: float = 8.0, workers: int = 8) -> int:
+        """Pre-flight: request url through every proxy concurrently; returns how many answered."""
+        host = urlparse(url).netloc.lower()
+
+        def check(proxy: str) -> bool:
+            started = time.monotonic()
+            try:
+                response = requests.get(url, proxies={'http': proxy, 'https': proxy}, timeout=timeout)
+                ok = not self.is_failure_status(response.status_code)
+            except Exception:
+                ok = False
+            self.report(proxy, host, ok, time.monotonic() - started, connection_error=not ok)
+            return ok
+
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(self.proxies))),
+                                thread_name_prefix='proxy-probe') as pool:
+            return sum(pool.map(check, self.proxies))
@@ -0,0 +1,138 @@
+"""
+Blogger API Rate Limiter
+محدودکننده نرخ درخواست‌های Blogger
+
+A token bucket shared by every Blogger API call in the process, plus retry
+with exponential backoff and jitter on 429 / 5xx (honouring Retry-After).
+Non-idempotent calls (posts().insert / publish) are only retried when Google
+rejected them for rate limiting: a 5xx may arrive after the post was created.
+Calls run at full speed until Google pushes back; on throttling the bucket
+rate is halved and then recovers gradually on success.
+"""
+
+import time
+import random
+import threading
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Optional
+
+try:
+    from googleapiclient.errors import HttpError
+except ImportError:
+    HttpError = None
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+THROTTLE_STATUS = {429}
+RATE_LIMIT_REASONS = ('rateLimitExceeded', 'userRateLimitExceeded', 'quotaExceeded')
+
+
+class TokenBucket:
+    """Thread-safe token bucket with multiplicative decrease / additive recovery."""
+
+    def __init__(self, rate: float = 1.0, burst: int = 5, min_rate: float = 0.05):
+        self.max_rate = max(rate, min_rate)
+        self.min_rate = min_rate
+        self.rate = self.max_rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Block until a token is available, then take it."""
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def throttled(self):
+        with self._lock:
+            self._refill()
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = min(self._tokens, 0.0)
+
+    def succeeded(self):
+        with self._lock:
+            if self.rate < self.max_rate:
+                self._refill()
+                self.rate = min(self.max_rate, self.rate + self.max_rate * 0.1)
+
+
+class BloggerRateLimiter:
+    """Runs googleapiclient requests through a shared TokenBucket with retry/backoff."""
+
+    def __init__(self, rate: float = 1.0, burst: int = 5, max_retries: int = 5,
+                 base_delay: float = 2.0, max_delay: float = 120.0):
+        self.bucket = TokenBucket(rate, burst)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    @staticmethod
+    def _status(error) -> Optional[int]:
+        resp = getattr(error, 'resp', None)
+        try:
+            return int(getattr(resp, 'status', None))
+        except (TypeError, ValueError):
+            return None
+
+    def is_retryable(self, error, idempotent: bool = True) -> bool:
+        """idempotent=False: only throttling, which guarantees the request was not applied."""
+        if HttpError is None or not isinstance(error, HttpError):
+            return False
+        status = self._status(error)
+        if status in (RETRYABLE_STATUS if idempotent else THROTTLE_STATUS):
+            return True
+        # Blogger reports per-user throttling as 403 with a rateLimitExceeded reason
+        return status == 403 and any(reason in str(error) for reason in RATE_LIMIT_REASONS)
+
+    @staticmethod
+    def _retry_after(error) -> Optional[float]:
+        resp = getattr(error, 'resp', None)
+        value = resp.get('retry-after') if hasattr(resp, 'get') else None
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+            return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            return None
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter: uniform in [0, min(cap, base * 2^attempt)]
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def execute(self, request, http=None, idempotent: bool = True):
+        """Execute an HttpRequest (or any object with .execute()) under the limiter."""
+        attempt = 0
+        while True:
+            self.bucket.acquire()
+            try:
+                result = request.execute(http=http) if http is not None else request.execute()
+            except Exception as e:
+                if not self.is_retryable(e, idempotent) or attempt >= self.max_retries:
+                    raise
+                self.bucket.throttled()
+                retry_after = self._retry_after(e)
+                delay = min(self.max_delay, retry_after) if retry_after is not None else self._backoff(attempt)
+                attempt += 1
+                print(f"  [RateLimit] {self._status(e) or type(e).__name__} from Blogger, "
+                      f"retry {attempt}/{self.max_retries} in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+            self.bucket.succeeded()
+            return result
@@ -0,0 +1,126 @@
+"""
+Recent Posts Index for the Related-Posts Widget
+فهرست آخرین پست‌ها برای ویجت «مطالب مرتبط»
+
+The widget for a freshly published article is built from the most recent
+posts on the blog. Instead of a posts().list call with full bodies for every
+article, the index is fetched once per run without bodies (fetchBodies=False,
+fetchImages=True, field mask) and updated in memory as posts are published.
+Optionally it is also kept on disk for RELATED_INDEX_TTL_MINUTES so
+back-to-back runs skip the list call entirely.
+"""
+
+import os
+import json
+import time
+from typing import Dict, List, Optional
+
+from cache_storage import write_json_atomic
+from update_all_posts import extract_post_image, get_persian_date
+
+DEFAULT_LABEL = "حقوق بشر"
+LIST_FIELDS = 'items(id,title,url,labels,published,images),nextPageToken'
+
+
+class RecentPostsIndex:
+    """Newest-first list of {id, title, url, labels, label, image, published}."""
+
+    def __init__(self, blogger, resolved_images: Optional[Dict] = None, max_posts: int = 50,
+                 cache_file: Optional[str] = None, ttl_seconds: int = 0):
+        self.blogger = blogger
+        self.resolved_images = resolved_images or {}
+        self.max_posts = max_posts
+        self.cache_file = cache_file
+        self.ttl_seconds = ttl_seconds
+        self.posts: Optional[List[Dict]] = None
+        self.fetched_at = 0.0
+
+    def _entry(self, item: Dict) -> Dict:
+        labels = item.get('labels', [])
+        label = labels[0] if labels else DEFAULT_LABEL
+        return {
+            'id': item.get('id', ''),
+            'title': item.get('title', ''),
+            'url': item.get('url', ''),
+            'labels': labels,
+            'label': label,
+            'image': extract_post_image(item, label, self.resolved_images),
+            'published': item.get('published', '')
+        }
+
+    def _load_disk(self) -> Optional[List[Dict]]:
+        if not self.cache_file or self.ttl_seconds <= 0 or not os.path.exists(self.cache_file):
+            return None
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if time.time() - data.get('fetched_at', 0) > self.ttl_seconds:
+                return None
+            self.fetched_at = data['fetched_at']
+            return data.get('posts', [])
+        except Exception as e:
+            print(f"[RelatedPosts] Error loading index cache: {e}")
+            return None
+
+    def _save_disk(self):
+        if not self.cache_file or self.ttl_seconds <= 0:
+            return
+        try:
+            write_json_atomic(self.cache_file, {'fetched_at': self.fetched_at, 'posts': self.posts}, ensure_ascii=False)
+        except Exception as e:
+            print(f"[RelatedPosts] Error saving index cache: {e}")
+
+    def _fetch(self) -> List[Dict]:
+        response = self.blogger.execute(self.blogger.service.posts().list(
+            blogId=self.blogger.blog_id,
+            maxResults=self.max_posts,
+            fetchBodies=False,
+            fetchImages=True,
+            fields=LIST_FIELDS
+        ))
+        return [self._entry(item) for item in response.get('items', [])]
+
+    def load(self) -> List[Dict]:
+        """Posts from memory, the on-disk cache, or a single body-less list call."""
+        if self.posts is None:
+            posts = self._load_disk()
+            if posts is None:
+                posts = self._fetch()
+                self.posts = posts
+                self.fetched_at = time.time()
+                self._save_disk()
+                print(f"[RelatedPosts] Indexed {len(posts)} recent posts")
+            else:
+                self.posts = posts
+        return self.posts
+
+    def add_published(self, post_result: Dict, labels: List[str], image: str = ""):
+        """Put a post we just created at the front so later articles of the run can link to it."""
+        if self.posts is None or not post_result:
+            return
+        entry = self._entry({
+            'id': post_result.get('id', ''),
+            'title': post_result.get('title', ''),
+            'url': post_result.get('url', ''),
+            'labels': labels,
+            'published': post_result.get('published', ''),
+            'images': [{'url': image}] if image else []
+        })
+        self.posts = [entry] + [p for p in self.posts if p['id'] != entry['id']][:self.max_posts - 1]
+        self._save_disk()
+
+    def select_related(self, labels: List[str], count: int = 3) -> List[Dict]:
+        """Most label overlap first, then newest; shaped for build_related_posts_widget."""
+        current = set(labels) if labels else {DEFAULT_LABEL}
+        ranked = sorted(
+            self.load(),
+            key=lambda p: (len(current.intersection(p['labels'] or [DEFAULT_LABEL])), p['published']),
+            reverse=True
+        )
+        return [{
+            'title': p['title'],
+            'url': p['url'],
+            'label': p['label'],
+            'image': p['image'],
+            'date': get_persian_date(p['published'])
+        } for p in ranked[:count]]
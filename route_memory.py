@@ -0,0 +1,77 @@
+"""
+Per-Host Fetch Route Memory
+حافظه بهترین مسیر دریافت برای هر میزبان
+
+_make_request can reach a page through cloudscraper, a proxy or a direct
+connection. RouteMemory remembers, per host, which of those answered first
+last time (tried first next time) and how long a winning answer usually
+takes. The hedge delay (how long to wait before also launching the next
+route) is derived from that latency. State is kept in fetch_routes.json so
+the next run starts with it.
+"""
+
+import os
+import json
+import threading
+import time
+from typing import Dict, List
+
+from cache_storage import write_json_atomic
+
+MIN_HEDGE_DELAY = 0.5
+LATENCY_WEIGHT = 0.3  # EWMA weight of the newest winning latency
+
+
+class RouteMemory:
+    """{host: {'winner', 'latency', 'wins': {route: count}, 'updated_at'}}"""
+
+    def __init__(self, path: str = "fetch_routes.json", default_delay: float = 3.0, max_delay: float = 10.0):
+        self.path = path
+        self.default_delay = default_delay
+        self.max_delay = max(max_delay, MIN_HEDGE_DELAY)
+        self.hosts: Dict[str, Dict] = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.hosts = json.load(f)
+            except Exception as e:
+                print(f"[WARNING] Error loading {path}: {e}")
+
+    def order(self, host: str, routes: List[str]) -> List[str]:
+        """routes with this host's last winner moved to the front."""
+        with self._lock:
+            winner = self.hosts.get(host, {}).get('winner')
+        if winner in routes:
+            return [winner] + [route for route in routes if route != winner]
+        return list(routes)
+
+    def hedge_delay(self, host: str) -> float:
+        with self._lock:
+            latency = self.hosts.get(host, {}).get('latency')
+        if latency is None:
+            return self.default_delay
+        # A winning answer normally arrives well within 2x its average latency
+        return min(self.max_delay, max(MIN_HEDGE_DELAY, latency * 2))
+
+    def record_win(self, host: str, route: str, latency: float):
+        with self._lock:
+            entry = self.hosts.setdefault(host, {'wins': {}})
+            entry['winner'] = route
+            previous = entry.get('latency')
+            entry['latency'] = latency if previous is None else (
+                LATENCY_WEIGHT * latency + (1 - LATENCY_WEIGHT) * previous)
+            entry['wins'][route] = entry['wins'].get(route, 0) + 1
+            entry['updated_at'] = time.time()
+            self._dirty = True
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            try:
+                write_json_atomic(self.path, self.hosts, ensure_ascii=False, indent=2)
+                self._dirty = False
+            except Exception as e:
+                print(f"[WARNING] Error saving {self.path}: {e}")
@@ -84,9 +84,9 @@ def update_stats_post(poster, stats_data):
             post_id = entries[0]["id"]["$t"].split("post-")[1]
             print(f"[INFO] Updating existing stats post {post_id}...")
             
-            post = poster.service.posts().get(blogId=blog_id, postId=post_id).execute()
+            post = poster.execute(poster.service.posts().get(blogId=blog_id, postId=post_id))
             post["content"] = json_content
-            poster.service.posts().update(blogId=blog_id, postId=post_id, body=post).execute()
+            poster.execute(poster.service.posts().update(blogId=blog_id, postId=post_id, body=post))
         else:
             # Create new
             print("[INFO] Creating new stats post...")
@@ -2,8 +2,10 @@ import sys
 import os
 import re
 import json
-import time
+import heapq
+import hashlib
 import socket
+from collections import Counter
 from urllib.parse import quote
 from datetime import datetime
 
@@ -13,6 +15,10 @@ socket.setdefaulttimeout(30)
 # Adjust path to import custom modules
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from blogger_poster import BloggerPoster
+from cache_storage import write_json_atomic
+from layout_snapshot import LayoutSnapshot, parse_timestamp
+from blogger_updates import PostUpdater, FailedUpdateQueue
+from config import BLOGGER_UPDATE_WORKERS, BLOGGER_UPDATE_BATCH_SIZE, BLOGGER_UPDATE_MAX_ATTEMPTS
 
 sys.stdout.reconfigure(encoding='utf-8')
 
@@ -30,6 +36,14 @@ try:
 except ImportError:
     HAS_BS4 = False
 
+# Import lxml for the fast clean_html_content path
+try:
+    import lxml.html
+    from lxml import etree
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
 def gregorian_to_jalali(gy, gm, gd):
     g_d_m = [0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304, 335]
     if (gy % 4 == 0 and gy % 100 != 0) or (gy % 400 == 0):
@@ -91,6 +105,16 @@ def get_persian_date(date_iso_str):
         print(f"Error parsing date {date_iso_str}: {e}")
         return "۲۸ اردیبهشت ۱۴۰۵"
 
+def proxy_image_url(img_url):
+    # Prevent double proxying if it's already a wsrv.nl or googleusercontent link
+    if "wsrv.nl" in img_url or "googleusercontent" in img_url or "wp.com" in img_url:
+        return img_url
+    
+    # Proxy standard external images with wsrv.nl instead of googleusercontent
+    if img_url.startswith("http"):
+        return f"https://wsrv.nl/?url={quote(img_url)}&w=600&output=webp&q=75"
+    return img_url
+
 def extract_first_image(content, label, resolved_images):
     if not content:
         return get_fallback_image(label, resolved_images)
@@ -98,18 +122,17 @@ def extract_first_image(content, label, resolved_images):
     # Try finding an image URL
     match = re.search(r'<img[^>]+src=["\']([^"\']+)["\']', content)
     if match:
-        img_url = match.group(1)
-        # Prevent double proxying if it's already a wsrv.nl or googleusercontent link
-        if "wsrv.nl" in img_url or "googleusercontent" in img_url or "wp.com" in img_url:
-            return img_url
-        
-        # Proxy standard external images with wsrv.nl instead of googleusercontent
-        if img_url.startswith("http"):
-            return f"https://wsrv.nl/?url={quote(img_url)}&w=600&output=webp&q=75"
-        return img_url
+        return proxy_image_url(match.group(1))
         
     return get_fallback_image(label, resolved_images)
 
+def extract_post_image(item, label, resolved_images):
+    """Thumbnail for a posts().list item: image metadata (fetchImages=True) first, then the body."""
+    images = item.get('images') or []
+    if images and images[0].get('url'):
+        return proxy_image_url(images[0]['url'])
+    return extract_first_image(item.get('content', ''), label, resolved_images)
+
 def get_fallback_image(label, resolved_images):
     # Disable stock images as per user preference
     return ""
@@ -120,7 +143,104 @@ def clean_html_content(content):
     and return the clean body."""
     if not content:
         return "", ""
+    
+    if HAS_LXML:
+        try:
+            return clean_html_content_lxml(content)
+        except Exception:
+            pass  # e.g. markup lxml refuses; the BeautifulSoup path below copes
+    return clean_html_content_soup(content)
+
+if HAS_LXML:
+    # Text as BeautifulSoup's get_text() sees it: no script/style/template/ruby-annotation strings
+    _TEXT_XPATH = etree.XPath(
+        './/text()[not(ancestor::script or ancestor::style or ancestor::template or ancestor::rt or ancestor::rp)]'
+    )
+    _PRESERVED_XPATH = etree.XPath('//pre | //textarea | //pre//* | //textarea//*')
+    _CLEANUP_XPATH = etree.XPath(
+        '//style | //script[@type="application/ld+json"] | //footer'
+    )
+
+# BeautifulSoup collapses every whitespace-only string to "\n" or " " while parsing
+_ASCII_SPACES = str.maketrans('', '', '\x20\x0a\x09\x0c\x0d')
+
+def _collapse_blank(text):
+    if text and not text.translate(_ASCII_SPACES):
+        return '\n' if '\n' in text else ' '
+    return text
+
+def _collapse_blank_strings(root):
+    preserved = set(_PRESERVED_XPATH(root))
+    for element in root.iter():
+        if isinstance(element.tag, str) and element not in preserved and element.text:
+            element.text = _collapse_blank(element.text)
+        if element.tail and element.getparent() not in preserved:
+            element.tail = _collapse_blank(element.tail)
+
+def _node_text(element):
+    return "".join(_TEXT_XPATH(element))
+
+def _is_detached(element, root):
+    top = element
+    for top in element.iterancestors():
+        pass
+    return top is not root
+
+def clean_html_content_lxml(content):
+    """Same output as clean_html_content_soup, on one lxml tree with compiled XPath."""
+    root = lxml.html.document_fromstring(content)
+    _collapse_blank_strings(root)
+    
+    # Remove all style tags, json-ld scripts and footers
+    for element in _CLEANUP_XPATH(root):
+        element.drop_tree()
+    
+    # Source box / tag cloud / related-posts divs; each div's text is computed once
+    for div in list(root.iter('div')):
+        if _is_detached(div, root):
+            continue  # inside a div that was already removed
+        style_attr = div.get('style', '')
+        class_attr = div.get('class', '').split()
+        text = _node_text(div)
+        if 'border-right:3px' in style_attr or 'border-left:3px' in style_attr or 'منبع خبر' in text:
+            div.drop_tree()
+        elif 'برچسب‌های مرتبط' in text and ('border-top' in style_attr or 'margin-top' in style_attr):
+            div.drop_tree()
+        elif 'related-posts-widget' in class_attr or ('مطالب مرتبط' in text and 'border' in style_attr):
+            div.drop_tree()
+    
+    # Extract main image if any (inside figure or img)
+    main_image = ""
+    img_tag = next(root.iter('img'), None)
+    if img_tag is not None:
+        main_image = img_tag.get('src', '')
+        figure = next(img_tag.iterancestors('figure'), None)
+        (figure if figure is not None else img_tag).drop_tree()
+    
+    # Reconstruct clean text paragraphs
+    paragraphs = []
+    for p in root.iter('p'):
+        style_attr = p.get('style', '')
+        
+        # Identify the SEO lead paragraph from previous versions and skip it entirely
+        if 'border-bottom:1px solid #333' in style_attr and 'font-weight:bold' in style_attr:
+            continue
         
+        text = _node_text(p).strip()
+        if text:
+            paragraphs.append(text)
+    
+    # In case there were no <p> tags, split by newline and get text
+    if not paragraphs:
+        for line in _node_text(root).split('\n'):
+            line_clean = line.strip()
+            if line_clean and len(line_clean) > 20:
+                paragraphs.append(line_clean)
+    
+    return paragraphs, main_image
+
+def clean_html_content_soup(content):
+    """BeautifulSoup implementation (reference for the lxml path, used when lxml is missing)."""
     if HAS_BS4:
         soup = BeautifulSoup(content, 'lxml' if 'lxml' in sys.modules else 'html.parser')
         
@@ -213,7 +333,7 @@ def clean_html_content(content):
             
         return paragraphs, main_image
 
-def build_related_posts_widget(related_posts, current_label):
+def build_related_posts_widget(related_posts, current_label, post_id=None):
     cards_html = []
     
     for post in related_posts:
@@ -280,10 +400,10 @@ def build_related_posts_widget(related_posts, current_label):
     """
     
     import base64
-    import uuid
     # Encode HTML to base64 to hide it from RSS readers and text extractors
     encoded_html = base64.b64encode(widget_html.encode('utf-8')).decode('utf-8')
-    uid = uuid.uuid4().hex
+    # Deterministic placeholder id (post id, else widget hash) so unchanged posts render byte-identical
+    uid = post_id or hashlib.md5(encoded_html.encode('utf-8')).hexdigest()[:16]
     
     js_wrapper = f"""
     <div id="related-{uid}"></div>
@@ -318,9 +438,267 @@ def build_related_posts_widget(related_posts, current_label):
     """
     return js_wrapper
 
-def update_posts(dry_run=False, limit=150):
+POST_DIGESTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "post_digests.json")
+
+def content_digest(html):
+    return hashlib.sha256((html or "").strip().encode('utf-8')).hexdigest()
+
+def load_post_digests(path=POST_DIGESTS_FILE):
+    """{post_id: {'html': digest of the HTML we rendered, 'content': digest of what Blogger stored}}"""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"[WARNING] Error loading {path}: {e}")
+        return {}
+
+def save_post_digests(digests, path=POST_DIGESTS_FILE):
+    try:
+        write_json_atomic(path, digests, ensure_ascii=False)
+    except Exception as e:
+        print(f"[WARNING] Error saving {path}: {e}")
+
+def is_unchanged(post, new_html, digests):
+    """True when the rebuilt HTML is what we last uploaded and nobody edited the post since."""
+    if new_html.strip() == post.get('content', '').strip():
+        return True
+    stored = digests.get(post['id'])
+    return bool(stored) and stored.get('html') == content_digest(new_html) \
+        and stored.get('content') == content_digest(post.get('content', ''))
+
+def post_entry(item, resolved_images):
+    """Index entry for a posts().list / posts().get item."""
+    content = item.get('content')
+    labels = item.get('labels', [])
+    
+    # Get clean label
+    default_label = labels[0] if labels else "حقوق بشر"
+    
+    return {
+        'id': item['id'],
+        'title': item['title'],
+        'url': item.get('url', ''),
+        'labels': labels,
+        'label': default_label,
+        # Extract image or fallback
+        'image': extract_post_image(item, default_label, resolved_images),
+        'published': item.get('published', ''),
+        'updated': item.get('updated', ''),
+        'content': content
+    }
+
+def related_signature(related_posts):
+    """Digest of everything about the neighbours that ends up in the widget."""
+    shown = [[p['id'], p['title'], p['url'], p['label'], p['image'], p['published']] for p in related_posts]
+    return hashlib.md5(json.dumps(shown, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+def fetch_changed_posts(poster, snapshot, resolved_images):
+    """Posts updated on Blogger since snapshot.last_sync, newest update first (with bodies)."""
+    since = parse_timestamp(snapshot.last_sync)
+    changed = []
+    next_page_token = None
+    while True:
+        response = poster.execute(poster.service.posts().list(
+            blogId=poster.blog_id,
+            maxResults=100,
+            orderBy='updated',
+            pageToken=next_page_token
+        ))
+        items = response.get('items', [])
+        for item in items:
+            updated = parse_timestamp(item.get('updated', ''))
+            if updated is not None and updated <= since:
+                return changed
+            snapshot.advance(item.get('updated', ''))
+            known = snapshot.posts.get(item['id'])
+            if known and known.get('updated') == item.get('updated'):
+                continue  # our own write from the last run
+            changed.append(post_entry(item, resolved_images))
+        next_page_token = response.get('nextPageToken')
+        if not items or not next_page_token:
+            return changed
+
+def fetch_live_post_ids(poster):
+    """Ids of every live post (deleted, draft and scheduled posts are not listed)."""
+    live_ids = set()
+    next_page_token = None
+    while True:
+        response = poster.execute(poster.service.posts().list(
+            blogId=poster.blog_id,
+            maxResults=100,
+            pageToken=next_page_token,
+            fetchBodies=False,
+            fields=LIVE_ID_FIELDS
+        ))
+        items = response.get('items', [])
+        live_ids.update(item['id'] for item in items)
+        next_page_token = response.get('nextPageToken')
+        if not items or not next_page_token:
+            return live_ids
+
+def load_incremental_posts(poster, snapshot, resolved_images):
+    """
+    Snapshot metadata merged with the changed posts, minus posts that are no longer
+    live; returns (all_posts, changed_ids, removed_ids).
+    """
+    live_ids = fetch_live_post_ids(poster)
+    changed = fetch_changed_posts(poster, snapshot, resolved_images)
+    changed_ids = {post['id'] for post in changed}
+    # A post published after the id listing shows up in `changed` and is kept
+    removed_ids = {post_id for post_id in snapshot.posts if post_id not in live_ids and post_id not in changed_ids}
+    for post_id in removed_ids:
+        snapshot.forget(post_id)
+    posts = {post_id: dict(entry, content=None) for post_id, entry in snapshot.posts.items()}
+    for post in changed:
+        posts[post['id']] = post
+        # Forget the old widget signature so the post is rebuilt even if its neighbours didn't move
+        snapshot.record(post, updated=post['updated'], related='')
+    all_posts = sorted(posts.values(), key=lambda p: p['published'], reverse=True)
+    return all_posts, changed_ids, removed_ids
+
+def is_not_found(error):
+    """True for the 404 Blogger returns for a deleted post."""
+    try:
+        return int(getattr(getattr(error, 'resp', None), 'status', None)) == 404
+    except (TypeError, ValueError):
+        return False
+
+INDEX_FIELDS = 'items(id,title,url,labels,published,updated,images),nextPageToken'
+LIVE_ID_FIELDS = 'items(id),nextPageToken'
+BODY_FIELDS = 'items(id,content),nextPageToken'
+
+def iter_work_posts(poster, work_posts, stream, first_ids=()):
+    """
+    Second pass over the posts to lay out. Posts in `first_ids` come first; with
+    stream=True the rest get their bodies from posts().list one page at a time
+    (same newest-first order as the index), otherwise load_post_body fetches them.
+    A post's content is dropped as soon as the next one is requested, so memory is
+    bounded by a page of bodies rather than by the whole blog.
+    """
+    previous = []
+    
+    def hand_over(post):
+        if previous:
+            previous.pop()['content'] = None
+        previous.append(post)
+        return post
+    
+    done = set()
+    for post in work_posts:
+        if post['id'] in first_ids:
+            done.add(post['id'])
+            yield hand_over(post)
+    
+    if not stream:
+        for post in work_posts:
+            if post['id'] not in done:
+                yield hand_over(post)
+    else:
+        by_id = {post['id']: post for post in work_posts}
+        next_page_token = None
+        while len(done) < len(by_id):
+            try:
+                response = poster.execute(poster.service.posts().list(
+                    blogId=poster.blog_id,
+                    maxResults=100,
+                    pageToken=next_page_token,
+                    fields=BODY_FIELDS
+                ))
+            except Exception as e:
+                print(f"[ERROR] Fetching post bodies: {e}")
+                break
+            items = response.get('items', [])
+            for item in items:
+                post = by_id.get(item['id'])
+                if post is None or post['id'] in done:
+                    continue  # published after the index was built, or already handled
+                done.add(post['id'])
+                post['content'] = item.get('content', '')
+                yield hand_over(post)
+            next_page_token = response.get('nextPageToken')
+            if not items or not next_page_token:
+                break
+    
+    if previous:
+        previous.pop()['content'] = None
+
+def load_post_body(poster, post):
+    if post.get('content') is None:
+        item = poster.execute(poster.service.posts().get(
+            blogId=poster.blog_id,
+            postId=post['id'],
+            fields='id,content,updated'
+        ))
+        post['content'] = item.get('content', '')
+        post['updated'] = item.get('updated', post.get('updated', ''))
+    return post
+
+class RelatedIndex:
+    """
+    Related-post ranking over the whole blog: most shared labels first, then newest.
+
+    Posts with the same label set always get the same ranking, so posts are grouped
+    by label set (each group presorted newest-first) and a label -> groups inverted
+    index finds the overlapping groups. The top-k per label set is picked with a heap
+    from the head of each overlapping group and cached, which makes ranking every post
+    near-linear instead of a full scan + sort per post.
+    """
+
+    def __init__(self, posts):
+        self.posts = posts
+        # Global newest-first order; ties keep the original (API) order like a stable sort
+        self.order = sorted(range(len(posts)), key=lambda i: posts[i]['published'], reverse=True)
+        self.rank = [0] * len(posts)
+        for position, i in enumerate(self.order):
+            self.rank[i] = position
+        self.groups = {}
+        for i in self.order:
+            self.groups.setdefault(self._label_key(posts[i]), []).append(i)
+        self.label_groups = {}
+        for key in self.groups:
+            for label in key:
+                self.label_groups.setdefault(label, []).append(key)
+        self._cache = {}
+
+    @staticmethod
+    def _label_key(post):
+        return frozenset(post['labels']) if post['labels'] else frozenset([post['label']])
+
+    def _ranked_for(self, key, k):
+        """Indices of the best k posts for label set `key` (may include the post itself)."""
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] >= k:
+            return cached[1]
+
+        overlaps = Counter()
+        for label in key:
+            overlaps.update(self.label_groups.get(label, ()))
+        # Only the first k of each group can make it into the top k
+        candidates = ((-overlap, self.rank[i], i) for group, overlap in overlaps.items()
+                      for i in self.groups[group][:k])
+        ranked = [i for _, _, i in heapq.nsmallest(k, candidates)]
+
+        # Not enough label matches: fill with the newest posts that share no label
+        if len(ranked) < k:
+            for i in self.order:
+                if self._label_key(self.posts[i]) not in overlaps:
+                    ranked.append(i)
+                    if len(ranked) == k:
+                        break
+
+        self._cache[key] = (k, ranked)
+        return ranked
+
+    def top_related(self, post, count=3):
+        """The `count` best related posts for `post`, excluding itself."""
+        ranked = self._ranked_for(self._label_key(post), count + 1)
+        return [self.posts[i] for i in ranked if self.posts[i]['id'] != post['id']][:count]
+
+def update_posts(dry_run=False, limit=150, incremental=False):
     print("=" * 70)
-    print(f"  Blogger Clean-up & Related Posts Engine (Dry-run: {dry_run}, Limit: {limit})")
+    print(f"  Blogger Clean-up & Related Posts Engine (Dry-run: {dry_run}, Limit: {limit}, Incremental: {incremental})")
     print("=" * 70)
     
     poster = BloggerPoster()
@@ -337,45 +715,51 @@ def update_posts(dry_run=False, limit=150):
     except Exception as e:
         print(f"[WARNING] Error loading resolved_images.json: {e}")
 
-    # Step 1: Fetch ALL posts on the blog to index them
-    print("\nFetching all posts to build index...")
+    snapshot = LayoutSnapshot() if incremental else None
     all_posts = []
+    targets = None
+    removed_ids = set()
+    
+    # Incremental: only posts changed since the last run are downloaded
+    if snapshot is not None and snapshot.ready():
+        try:
+            print(f"\nFetching posts updated since {snapshot.last_sync}...")
+            all_posts, targets, removed_ids = load_incremental_posts(poster, snapshot, resolved_images)
+            print(f"[OK] {len(targets)} changed posts, {len(removed_ids)} removed, "
+                  f"{len(all_posts)} posts in snapshot.")
+        except Exception as e:
+            print(f"[WARNING] Incremental fetch failed ({e}), falling back to a full re-index.")
+            snapshot.reset()
+            all_posts, targets, removed_ids = [], None, set()
+    
+    # Step 1: Fetch ALL posts on the blog to index them (metadata only)
+    if targets is None:
+        print("\nFetching all posts to build index...")
     next_page_token = None
     
     # Fetch up to 10000 posts to build a rich recent index and cover everything
     max_index_fetch = 10000
-    while len(all_posts) < max_index_fetch:
+    while targets is None and len(all_posts) < max_index_fetch:
         try:
-            response = poster.service.posts().list(
+            # Pass 1: compact metadata only; bodies are streamed in pass 2
+            response = poster.execute(poster.service.posts().list(
                 blogId=poster.blog_id,
                 maxResults=100,
-                pageToken=next_page_token
-            ).execute()
+                pageToken=next_page_token,
+                fetchBodies=False,
+                fetchImages=True,
+                fields=INDEX_FIELDS
+            ))
             
             items = response.get('items', [])
             if not items:
                 break
                 
             for item in items:
-                content = item.get('content', '')
-                labels = item.get('labels', [])
-                
-                # Get clean label
-                default_label = labels[0] if labels else "حقوق بشر"
-                
-                # Extract image or fallback
-                img_url = extract_first_image(content, default_label, resolved_images)
-                
-                all_posts.append({
-                    'id': item['id'],
-                    'title': item['title'],
-                    'url': item.get('url', ''),
-                    'labels': labels,
-                    'label': default_label,
-                    'image': img_url,
-                    'published': item.get('published', ''),
-                    'content': content
-                })
+                all_posts.append(post_entry(item, resolved_images))
+                if snapshot is not None:
+                    snapshot.record(all_posts[-1], updated=item.get('updated', ''))
+                    snapshot.advance(item.get('updated', ''))
                 
             next_page_token = response.get('nextPageToken')
             if not next_page_token:
@@ -385,35 +769,88 @@ def update_posts(dry_run=False, limit=150):
             break
             
     print(f"[OK] Indexed {len(all_posts)} posts.")
+    related_index = RelatedIndex(all_posts)
+    digests = load_post_digests()
+    failed = FailedUpdateQueue(max_attempts=BLOGGER_UPDATE_MAX_ATTEMPTS)
+    
+    # Incremental: rebuild changed posts plus posts whose related-posts neighbours changed
+    work_posts = all_posts
+    if targets is not None:
+        for post in all_posts:
+            known = snapshot.posts.get(post['id'], {})
+            if post['id'] in failed or known.get('related') != related_signature(related_index.top_related(post, 3)):
+                targets.add(post['id'])
+        work_posts = [post for post in all_posts if post['id'] in targets]
+        print(f"[OK] {len(work_posts)} posts need a new layout.")
+    
+    # Posts whose update failed last time go first (deleted ones are dropped)
+    if targets is None and all_posts:
+        known_ids = {post['id'] for post in all_posts}
+        removed_ids = {post_id for post_id in failed.items if post_id not in known_ids}
+    for post_id in removed_ids:
+        failed.discard(post_id)
+        digests.pop(post_id, None)
+    if len(failed):
+        print(f"[OK] Retrying {len(failed)} previously failed updates first.")
     
     # Process each post up to the limit
     updated_count = 0
+    skipped_count = 0
+    
+    def forget_post(post_id):
+        failed.discard(post_id)
+        digests.pop(post_id, None)
+        if snapshot is not None:
+            snapshot.forget(post_id)
+    
+    def on_update_done(job, updated, error):
+        nonlocal updated_count
+        post = job['context']['post']
+        if error is not None and is_not_found(error):
+            print(f"  [SKIP] Post {post['id']} no longer exists on Blogger; forgetting it.")
+            forget_post(post['id'])
+            return
+        if error is not None:
+            print(f"  [ERROR] Failed to update post {post['id']}: {error}")
+            failed.add(post['id'], str(error))
+            return
+        
+        failed.discard(post['id'])
+        digests[post['id']] = {
+            'html': job['context']['html_digest'],
+            'content': content_digest((updated or {}).get('content', job['body']['content']))
+        }
+        if snapshot is not None:
+            snapshot.record(post, updated=(updated or {}).get('updated'),
+                            digest=digests[post['id']]['content'], related=job['context']['related'])
+        print(f"  [SUCCESS] Post {post['id']} successfully updated on Blogger!")
+        updated_count += 1
+        if updated_count % 25 == 0:
+            save_post_digests(digests)
+            failed.save()
+            if snapshot is not None:
+                snapshot.save()
+    
+    updater = None
+    if not dry_run:
+        updater = PostUpdater(poster, on_update_done,
+                              workers=BLOGGER_UPDATE_WORKERS, batch_size=BLOGGER_UPDATE_BATCH_SIZE)
     
-    for idx, post in enumerate(all_posts):
+    # Pass 2: bodies arrive page by page (or one by one for the incremental/failed posts)
+    for idx, post in enumerate(iter_work_posts(poster, work_posts, stream=targets is None, first_ids=failed.items)):
         if idx >= limit and not dry_run:
             print(f"\nReached update limit of {limit} posts. Stopping updates.")
             break
             
-        print(f"\n[{idx+1}/{min(len(all_posts), limit) if not dry_run else 3}] Processing: {post['title'][:50]} (ID: {post['id']})")
+        print(f"\n[{idx+1}/{min(len(work_posts), limit) if not dry_run else 3}] Processing: {post['title'][:50]} (ID: {post['id']})")
         
-        # Determine 3 related posts based on labels
-        current_labels = set(post['labels']) if post['labels'] else {post['label']}
-        related_candidates = []
-        
-        for cand in all_posts:
-            if cand['id'] == post['id']:
-                continue
-            # Calculate overlapping labels
-            cand_labels = set(cand['labels']) if cand['labels'] else {cand['label']}
-            overlap = len(current_labels.intersection(cand_labels))
-            related_candidates.append((overlap, cand))
-            
-        # Sort related candidates: highest label overlap first, then newest published date
-        related_candidates.sort(key=lambda x: (x[0], x[1]['published']), reverse=True)
+        # Determine 3 related posts based on labels (inverted index, no full scan)
+        related_candidates = related_index.top_related(post, 3)
+        related_sig = related_signature(related_candidates)
         
         # Pick top 3
         selected_posts = []
-        for score, cand in related_candidates[:3]:
+        for cand in related_candidates:
             # Convert Gregorian date of candidates to elegant Jalali
             persian_date_cand = get_persian_date(cand['published'])
             selected_posts.append({
@@ -440,11 +877,28 @@ def update_posts(dry_run=False, limit=150):
                 if len(selected_posts) == 3:
                     break
                     
+        # Posts that were not streamed with a body (incremental / retried) are fetched one by one
+        try:
+            load_post_body(poster, post)
+        except Exception as e:
+            if is_not_found(e):
+                print(f"  [SKIP] Post {post['id']} no longer exists on Blogger; forgetting it.")
+                if not dry_run:
+                    forget_post(post['id'])
+                continue
+            print(f"  [ERROR] Fetching body of post {post['id']}: {e}")
+            if not dry_run:
+                failed.add(post['id'], str(e))
+            continue
+        
         # Parse and clean post content
         paragraphs, main_image = clean_html_content(post['content'])
         
         if not paragraphs:
             print("  [Warning] Could not extract paragraphs, skipping cleanup to avoid empty content.")
+            failed.discard(post['id'])
+            if snapshot is not None and not dry_run:
+                snapshot.record(post, related=related_sig)
             continue
             
         # Ensure we have a valid main image
@@ -508,7 +962,7 @@ def update_posts(dry_run=False, limit=150):
 </figure>'''
 
         # Build "مطالب مرتبط" Widget
-        related_widget_html = build_related_posts_widget(selected_posts, post['label'])
+        related_widget_html = build_related_posts_widget(selected_posts, post['label'], post_id=post['id'])
         
         # Reconstruct clean, single footer
         single_footer_html = f"""
@@ -562,38 +1016,40 @@ def update_posts(dry_run=False, limit=150):
                 print("\n[DRY-RUN] Processed 3 sample posts. Stopping dry-run.")
                 break
         else:
-            # Check if the new HTML is exactly the same as the existing content
-            # We strip both to ignore trailing newlines or whitespace differences at the very ends
-            if new_html.strip() == post.get('content', '').strip():
+            # Skip if the new HTML equals the existing content, or equals what we uploaded last
+            # time and Blogger still holds that upload (Blogger may normalize stored HTML)
+            if is_unchanged(post, new_html, digests):
                 print(f"  [SKIP] Post already has the latest correct layout and HTML. Skipping API call.")
+                skipped_count += 1
+                failed.discard(post['id'])
+                if snapshot is not None:
+                    snapshot.record(post, digest=content_digest(post['content']), related=related_sig)
                 continue
 
-            # Update post on Blogger
-            try:
-                body = {
-                    'id': post['id'],
-                    'title': post['title'],
-                    'content': new_html,
-                    'labels': post['labels']
-                }
-                
-                poster.service.posts().update(
-                    blogId=poster.blog_id,
-                    postId=post['id'],
-                    body=body
-                ).execute()
-                
-                print("  [SUCCESS] Post successfully updated on Blogger!")
-                updated_count += 1
-                
-                # Small anti-rate limit delay
-                time.sleep(2)
-            except Exception as e:
-                print(f"  [ERROR] Failed to update post {post['id']}: {e}")
-                time.sleep(5)
+            # Update post on Blogger (worker pool; bookkeeping happens in on_update_done)
+            body = {
+                'id': post['id'],
+                'title': post['title'],
+                'content': new_html,
+                'labels': post['labels']
+            }
+            updater.submit(post['id'], body, {
+                'post': post,
+                'html_digest': content_digest(new_html),
+                'related': related_sig
+            })
                 
+    if updater is not None:
+        updater.close()
+    
+    if not dry_run:
+        save_post_digests(digests)
+        failed.save()
+        if snapshot is not None:
+            snapshot.save()
+    
     print("\n" + "=" * 70)
-    print(f"  Engine finished. Processed {updated_count} posts.")
+    print(f"  Engine finished. Processed {updated_count} posts, {skipped_count} unchanged.")
     print("=" * 70)
 
 if __name__ == '__main__':
@@ -606,4 +1062,4 @@ if __name__ == '__main__':
                 limit_val = int(sys.argv[idx + 1])
             except ValueError:
                 pass
-    update_posts(dry_run=is_dry_run, limit=limit_val)
+    update_posts(dry_run=is_dry_run, limit=limit_val, incremental='--incremental' in sys.argv)